@@ -495,7 +495,7 @@ def home():
                 <div class="feature-card">
                     <div class="feature-icon">⏱</div>
                     <div class="feature-title">Гибкие таймфреймы</div>
-                    <div>Анализ на таймфреймах 1, 5, 15, 30 минут для краткосрочных и среднесрочных стратегий</div>
+                    <div>Анализ на таймфреймах 5, 15, 30 минут для краткосрочных и среднесрочных стратегий</div>
                 </div>
             </div>
         </div>
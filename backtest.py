@@ -0,0 +1,176 @@
+"""Vectorized backtest of the MarketAnalyzer signal rules.
+
+Evaluates the analyze_timeframe scoring for every bar of a history in one
+pass over NumPy arrays, scores each BUY/SELL against the close at the end
+of its expiration and builds hit-rate and confidence-calibration tables
+per pair and timeframe.
+
+    python backtest.py [--replay-dir DIR] [--timeframes 5 15 30] [--pairs EUR/USD ...]
+
+Without --replay-dir the history comes from the on-disk bar store.
+"""
+import argparse
+import logging
+
+import numpy as np
+
+from bar_buffer import INTERVAL_NS, PRICE_COLUMNS, aggregate_bars, frame_to_arrays
+from bar_store import bar_store
+from config import CURRENCY_PAIRS
+from market_analyzer import INDICATOR_WARMUP, SIGNAL_PARAMS, TIMEFRAMES, resolution_for, signal_arrays
+from market_data import DEFAULT_INTERVAL, interval_seconds
+from market_providers import ReplayProvider, replay_file_name
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_BINS = (50, 60, 70, 80, 90, 95.01)  # confidence bin edges, the last bin holds the 95% cap
+
+def score_signals(close, signal, horizon, warmup=INDICATOR_WARMUP):
+    """Outcome of every BUY/SELL ``horizon`` bars later.
+
+    Returns (mask, hit): mask selects the scored bars (a signal, past the
+    warm-up, with the expiration inside the history), hit is True where the
+    close at expiration moved in the signalled direction. A flat close is a miss.
+    """
+    close = np.asarray(close, dtype=float)
+    n = close.size
+    mask = np.zeros(n, dtype=bool)
+    hit = np.zeros(n, dtype=bool)
+    if n <= horizon:
+        return mask, hit
+    mask[warmup:n - horizon] = signal[warmup:n - horizon] != 0
+    move = np.zeros(n)
+    move[:n - horizon] = close[horizon:] - close[:n - horizon]
+    hit = mask & (np.sign(move) == signal)
+    return mask, hit
+
+def calibration_table(confidence, hit, bins=CALIBRATION_BINS):
+    """Rows of (confidence bin, signals, mean confidence, hit rate) for scored signals"""
+    rows = []
+    index = np.digitize(confidence, bins) - 1
+    for i in range(len(bins) - 1):
+        selected = index == i
+        count = int(selected.sum())
+        rows.append({
+            'bin': f"{bins[i]:g}-{min(bins[i + 1], 95):g}%",
+            'signals': count,
+            'confidence': float(confidence[selected].mean()) if count else None,
+            'hit_rate': float(hit[selected].mean() * 100) if count else None,
+        })
+    return rows
+
+def resample_bars(timestamps, values, interval):
+    """Native bars rolled up to ``interval`` with the bar pyramid's OHLCV rules"""
+    if interval == DEFAULT_INTERVAL:
+        return timestamps, values
+    return aggregate_bars(timestamps, values, INTERVAL_NS[interval])
+
+def backtest_pair(timestamps, values, timeframes=None, params=SIGNAL_PARAMS):
+    """Backtest one pair's native bars for every timeframe.
+
+    Each timeframe runs on the resolution analyze_market uses for it and
+    expires after the timeframe length (at least one bar). Returns
+    {minutes: result} with overall, BUY and SELL hit rates and the
+    calibration table.
+    """
+    timeframes = timeframes or TIMEFRAMES
+    results = {}
+    for minutes in timeframes:
+        interval = resolution_for(minutes)
+        _, bars_values = resample_bars(timestamps, values, interval)
+        close = bars_values[PRICE_COLUMNS.index('close')]
+        volume = bars_values[PRICE_COLUMNS.index('volume')]
+        bars = max(1, minutes * 60 // interval_seconds(interval))
+
+        signals = signal_arrays(close, volume, bars, params)
+        mask, hit = score_signals(close, signals['signal'], horizon=bars)
+        direction = signals['signal']
+        scored = int(mask.sum())
+        results[minutes] = {
+            'resolution': interval,
+            'bars': int(close.size),
+            'signals': scored,
+            'hit_rate': float(hit[mask].mean() * 100) if scored else None,
+            'buy_hit_rate': _rate(hit, mask & (direction > 0)),
+            'sell_hit_rate': _rate(hit, mask & (direction < 0)),
+            'calibration': calibration_table(signals['confidence'][mask], hit[mask]),
+        }
+    return results
+
+def _rate(hit, selected):
+    return float(hit[selected].mean() * 100) if selected.any() else None
+
+def backtest(histories, timeframes=None, params=SIGNAL_PARAMS):
+    """{pair: backtest_pair(...)} for {pair: (timestamps, values)} native histories"""
+    return {
+        pair: backtest_pair(timestamps, values, timeframes, params)
+        for pair, (timestamps, values) in histories.items()
+    }
+
+def resolve_pairs(names):
+    """CURRENCY_PAIRS keys for names given as keys, symbols or without the emoji (EUR/USD)"""
+    pairs = []
+    for name in names:
+        for pair, symbol in CURRENCY_PAIRS.items():
+            if name in (pair, symbol) or pair.split(' ', 1)[-1] == name:
+                pairs.append(pair)
+                break
+        else:
+            raise ValueError(f"Unknown pair {name}")
+    return pairs
+
+def load_histories(pairs=None, replay_dir=None):
+    """Native bar histories per pair from the bar store or a replay directory"""
+    pairs = resolve_pairs(pairs) if pairs else list(CURRENCY_PAIRS)
+    frames = ReplayProvider._load(replay_dir) if replay_dir else None
+    histories = {}
+    for pair in pairs:
+        symbol = CURRENCY_PAIRS[pair]
+        if frames is not None:
+            df = frames.get(replay_file_name(symbol))
+            if df is None:
+                continue
+            if 'Volume' not in df.columns:
+                df = df.assign(Volume=1.0)
+            timestamps, values = frame_to_arrays(df)
+        else:
+            timestamps, values = bar_store.load(symbol, DEFAULT_INTERVAL)
+        if timestamps.size:
+            histories[pair] = (timestamps, values)
+    return histories
+
+def _fmt(value, spec='.1f'):
+    return '-' if value is None else format(value, spec)
+
+def format_report(results):
+    lines = []
+    for pair, timeframes in results.items():
+        lines.append(pair)
+        for minutes, result in timeframes.items():
+            lines.append(
+                f"  {minutes:>4}m ({result['resolution']:>3}, {result['bars']} bars): "
+                f"{result['signals']:6d} signals  hit {_fmt(result['hit_rate'])}%  "
+                f"BUY {_fmt(result['buy_hit_rate'])}%  SELL {_fmt(result['sell_hit_rate'])}%"
+            )
+            for row in result['calibration']:
+                if row['signals']:
+                    lines.append(
+                        f"        {row['bin']:>7}  {row['signals']:6d}  "
+                        f"conf {_fmt(row['confidence'])}%  hit {_fmt(row['hit_rate'])}%"
+                    )
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--replay-dir', help='CSV/Parquet bar files (see ReplayProvider) instead of the bar store')
+    parser.add_argument('--timeframes', type=int, nargs='+', default=TIMEFRAMES)
+    parser.add_argument('--pairs', nargs='+', help='pairs such as EUR/USD or symbols such as EURUSD=X')
+    args = parser.parse_args()
+
+    histories = load_histories(args.pairs, args.replay_dir)
+    if not histories:
+        raise SystemExit("No bar history found")
+    print(format_report(backtest(histories, args.timeframes)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+FRAME_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+DEFAULT_CAPACITY = 512  # bars per buffer, ~1.7 days of 5-minute bars
+
+def frame_to_arrays(df):
+    """(int64 ns UTC timestamps, (5, n) float values) from an OHLCV frame"""
+    index = df.index if df.index.tz is not None else df.index.tz_localize('UTC')
+    timestamps = index.tz_convert('UTC').as_unit('ns').asi8
+    values = np.vstack([df[column].to_numpy(dtype=np.float64) for column in FRAME_COLUMNS])
+    return timestamps, values
+
+def bars_to_frame(bars):
+    """OHLCV DataFrame indexed by 'Datetime' (UTC) from a BarBuffer.window() dict"""
+    index = pd.DatetimeIndex(pd.to_datetime(bars['timestamp'], utc=True), name='Datetime')
+    return pd.DataFrame(
+        {frame_column: bars[column] for frame_column, column in zip(FRAME_COLUMNS, PRICE_COLUMNS)},
+        index=index
+    )
+
+class BarBuffer:
+    """Fixed-capacity columnar ring buffer of OHLCV bars.
+
+    Timestamps (int64 nanoseconds, UTC) and the five price/volume columns are
+    kept in NumPy arrays. Every bar is written twice, at slot and
+    slot + capacity, so the latest n bars are always one contiguous slice
+    and window() can return read-only views without copying.
+    Updates are append-only: a bar with the same timestamp as the last one
+    replaces it (the bar still forming), older bars are ignored.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.zeros((len(PRICE_COLUMNS), 2 * capacity), dtype=np.float64)
+        self._head = 0  # slot of the next write
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return self._timestamps.nbytes + self._values.nbytes
+
+    @property
+    def last_timestamp(self):
+        """Timestamp of the newest bar in ns, None when empty"""
+        if not self._count:
+            return None
+        return int(self._timestamps[(self._head - 1) % self.capacity])
+
+    def _write(self, slots, timestamps, values):
+        self._timestamps[slots] = timestamps
+        self._timestamps[slots + self.capacity] = timestamps
+        self._values[:, slots] = values
+        self._values[:, slots + self.capacity] = values
+
+    def append(self, timestamp, open_, high, low, close, volume):
+        """Append one bar; returns False when the bar is older than the last one"""
+        return self.extend(
+            np.array([timestamp], dtype=np.int64),
+            np.array([[open_], [high], [low], [close], [volume]], dtype=np.float64)
+        ) > 0
+
+    def extend(self, timestamps, values):
+        """Append bars in time order.
+
+        timestamps: int64 ns array of length m, values: (5, m) array in
+        PRICE_COLUMNS order. Returns the number of bars written.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            last = self.last_timestamp
+            written = 0
+            if last is not None:
+                # The forming bar is re-sent with new prices: replace it in place
+                same = np.flatnonzero(timestamps == last)
+                if same.size:
+                    slot = np.array([(self._head - 1) % self.capacity])
+                    self._write(slot, timestamps[same[-1:]], values[:, same[-1:]])
+                    written += 1
+                newer = timestamps > last
+                timestamps = timestamps[newer]
+                values = values[:, newer]
+
+            if timestamps.size > self.capacity:
+                timestamps = timestamps[-self.capacity:]
+                values = values[:, -self.capacity:]
+
+            count = timestamps.size
+            if count:
+                slots = (self._head + np.arange(count)) % self.capacity
+                self._write(slots, timestamps, values)
+                self._head = (self._head + count) % self.capacity
+                self._count = min(self._count + count, self.capacity)
+                written += count
+            return written
+
+    def extend_frame(self, df):
+        """Append the bars of an OHLCV frame indexed by time"""
+        return self.extend(*frame_to_arrays(df))
+
+    def window(self, n=None):
+        """Zero-copy read-only views of the latest n bars (all bars when n is None).
+
+        Returns a dict with 'timestamp' and the PRICE_COLUMNS arrays.
+        """
+        with self._lock:
+            n = self._count if n is None else min(n, self._count)
+            start = (self._head - n) % self.capacity
+            views = {'timestamp': self._timestamps[start:start + n]}
+            for row, column in enumerate(PRICE_COLUMNS):
+                views[column] = self._values[row, start:start + n]
+        for view in views.values():
+            view.flags.writeable = False
+        return views
+
+    def to_frame(self, n=None):
+        """Copy the latest n bars into an OHLCV DataFrame indexed by 'Datetime'"""
+        return bars_to_frame(self.window(n))
+
+    @classmethod
+    def from_frame(cls, df, capacity=DEFAULT_CAPACITY):
+        buffer = cls(capacity)
+        buffer.extend_frame(df)
+        return buffer
+
+PYRAMID_INTERVALS = ('5m', '15m', '30m', '1h', '4h')
+INTERVAL_NS = {
+    '5m': 300 * 10**9,
+    '15m': 900 * 10**9,
+    '30m': 1800 * 10**9,
+    '1h': 3600 * 10**9,
+    '4h': 14400 * 10**9,
+}
+
+def aggregate_bars(timestamps, values, length_ns):
+    """Aggregate time-ordered bars into buckets of length_ns (aligned to the epoch, UTC).
+
+    Rules per bucket: open = first open, high = max high, low = min low,
+    close = last close, volume = sum of volumes; the bucket is stamped with
+    its start time. Returns (bucket_timestamps, values) like BarBuffer.extend.
+    """
+    buckets = timestamps // length_ns * length_ns
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], timestamps.size] - 1
+    open_, high, low, close, volume = values
+    aggregated = np.vstack([
+        open_[starts],
+        np.maximum.reduceat(high, starts),
+        np.minimum.reduceat(low, starts),
+        close[ends],
+        np.add.reduceat(volume, starts)
+    ])
+    return buckets[starts], aggregated
+
+class BarPyramid:
+    """Native bars plus incrementally derived coarser resolutions for one symbol.
+
+    Native bars go into the base BarBuffer; every derived level is updated
+    from the incoming bars plus the already stored native bars of the bucket
+    that is still forming, so a revised native bar also revises its 15m..4h
+    buckets. Derived levels keep growing from the stream even when the
+    native buffer has wrapped around.
+    """
+
+    def __init__(self, base_interval='5m', intervals=PYRAMID_INTERVALS, capacity=DEFAULT_CAPACITY):
+        if base_interval not in intervals:
+            raise ValueError(f"Base interval {base_interval} is not one of {intervals}")
+        self.base_interval = base_interval
+        self.intervals = tuple(intervals)
+        self.levels = {interval: BarBuffer(capacity) for interval in intervals}
+        self._lock = threading.Lock()
+
+    @property
+    def base(self):
+        return self.levels[self.base_interval]
+
+    def extend(self, timestamps, values):
+        """Append native bars and roll them up into every coarser level"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            last = self.base.last_timestamp
+            if last is not None:
+                keep = timestamps >= last
+                timestamps, values = timestamps[keep], values[:, keep]
+            if not timestamps.size:
+                return 0
+
+            stored = self.base.window()
+            base_length = INTERVAL_NS[self.base_interval]
+            for interval in self.intervals:
+                length = INTERVAL_NS[interval]
+                if length <= base_length:
+                    continue
+                # Native bars already stored in the bucket the first new bar falls into
+                bucket_start = timestamps[0] // length * length
+                prior = (stored['timestamp'] >= bucket_start) & (stored['timestamp'] < timestamps[0])
+                bucket_timestamps = np.concatenate([stored['timestamp'][prior], timestamps])
+                bucket_values = np.hstack([
+                    np.vstack([stored[column][prior] for column in PRICE_COLUMNS]),
+                    values
+                ])
+                self.levels[interval].extend(*aggregate_bars(bucket_timestamps, bucket_values, length))
+
+            return self.base.extend(timestamps, values)
+
+    def extend_frame(self, df):
+        return self.extend(*frame_to_arrays(df))
+
+    @property
+    def nbytes(self):
+        return sum(level.nbytes for level in self.levels.values())
+
+class BarBufferRegistry:
+    """Process-wide bar pyramids keyed by symbol"""
+
+    def __init__(self, base_interval='5m', capacity=DEFAULT_CAPACITY):
+        self.base_interval = base_interval
+        self.capacity = capacity
+        self._pyramids = {}
+        self._lock = threading.Lock()
+
+    def pyramid(self, symbol, create=True):
+        with self._lock:
+            pyramid = self._pyramids.get(symbol)
+            if pyramid is None and create:
+                pyramid = self._pyramids[symbol] = BarPyramid(self.base_interval, capacity=self.capacity)
+            return pyramid
+
+    def get(self, symbol, interval, create=True):
+        """The BarBuffer holding symbol's bars at interval"""
+        pyramid = self.pyramid(symbol, create)
+        return pyramid.levels.get(interval) if pyramid is not None else None
+
+    def store_frame(self, symbol, interval, df):
+        if interval != self.base_interval:
+            raise ValueError(f"Only {self.base_interval} bars can be stored, got {interval}")
+        written = self.pyramid(symbol).extend_frame(df)
+        logger.debug(f"Stored {written} bars for {symbol} ({interval})")
+        return written
+
+    def symbols(self):
+        with self._lock:
+            return list(self._pyramids)
+
+    def nbytes(self):
+        with self._lock:
+            return sum(pyramid.nbytes for pyramid in self._pyramids.values())
+
+bar_buffers = BarBufferRegistry()
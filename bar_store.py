@@ -0,0 +1,114 @@
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from market_data import interval_seconds
+
+logger = logging.getLogger(__name__)
+
+BAR_STORE_DIR = os.environ.get(
+    'BAR_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars')
+)
+RESTORE_DAYS = 10  # history loaded back into memory on startup, enough for the 4h level
+
+# One closed bar per record; the files are plain arrays of these
+BAR_RECORD = np.dtype([
+    ('timestamp', '<i8'),  # bar start, ns since the epoch (UTC)
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+class BarStore:
+    """Append-only on-disk store of closed OHLCV bars, one file per (symbol, interval).
+
+    Files are raw BAR_RECORD arrays read back through np.memmap, so loading
+    recent history only touches the tail of the file. Only bars newer than
+    the last stored one are appended; a record torn by a crash mid-write is
+    cut off before the next append. A store without a directory does nothing.
+    """
+
+    def __init__(self, directory=BAR_STORE_DIR):
+        self.directory = directory or None
+        self._last = {}
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, symbol, interval):
+        name = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        return os.path.join(self.directory, f"{name}_{interval}.bars")
+
+    def _records(self, path):
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        count = size // BAR_RECORD.itemsize
+        if not count:
+            return np.empty(0, dtype=BAR_RECORD)
+        return np.memmap(path, dtype=BAR_RECORD, mode='r', shape=(count,))
+
+    def _last_timestamp(self, symbol, interval, path):
+        key = (symbol, interval)
+        if key not in self._last:
+            records = self._records(path)
+            self._last[key] = int(records['timestamp'][-1]) if len(records) else None
+        return self._last[key]
+
+    def append(self, symbol, interval, timestamps, values, now=None):
+        """Persist the closed bars newer than the last stored one.
+
+        timestamps and values use the BarBuffer.extend layout. Returns the
+        number of records written.
+        """
+        if not self.directory:
+            return 0
+        now = time.time() if now is None else now
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        closed = timestamps + interval_seconds(interval) * 10**9 <= int(now * 10**9)
+
+        path = self.path(symbol, interval)
+        with self._lock:
+            last = self._last_timestamp(symbol, interval, path)
+            if last is not None:
+                closed &= timestamps > last
+            if not closed.any():
+                return 0
+
+            records = np.empty(int(closed.sum()), dtype=BAR_RECORD)
+            records['timestamp'] = timestamps[closed]
+            for row, column in enumerate(BAR_RECORD.names[1:]):
+                records[column] = values[row][closed]
+
+            with open(path, 'ab') as f:
+                # Drop a torn record left by a crash so the file stays aligned
+                torn = f.tell() % BAR_RECORD.itemsize
+                if torn:
+                    logger.warning(f"Truncating {torn} trailing bytes in {path}")
+                    f.truncate(f.tell() - torn)
+                    f.seek(0, os.SEEK_END)
+                f.write(records.tobytes())
+            self._last[(symbol, interval)] = int(records['timestamp'][-1])
+        return len(records)
+
+    def load(self, symbol, interval, since=None):
+        """Stored bars with timestamp >= since (ns), as (timestamps, values)"""
+        if not self.directory:
+            return np.empty(0, dtype=np.int64), np.empty((5, 0))
+        with self._lock:
+            records = self._records(self.path(symbol, interval))
+        if since is not None:
+            records = records[np.searchsorted(records['timestamp'], since):]
+        timestamps = np.array(records['timestamp'])
+        values = np.vstack([records[column] for column in BAR_RECORD.names[1:]]) if len(records) else np.empty((5, 0))
+        return timestamps, values
+
+    def load_recent(self, symbol, interval, days=RESTORE_DAYS, now=None):
+        now = time.time() if now is None else now
+        return self.load(symbol, interval, since=int((now - days * 86400) * 10**9))
+
+bar_store = BarStore()
@@ -0,0 +1,82 @@
+"""Golden check and benchmark for the vectorized backtester.
+
+Checks that backtest.signal_arrays gives the same signal and confidence
+as MarketAnalyzer.analyze_timeframe at sampled bars of a synthetic
+history, then compares one vectorized pass over the whole history with
+the estimated cost of calling analyze_timeframe bar by bar.
+
+    python benchmarks/bench_backtest.py [--days 30] [--samples 300]
+"""
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+
+from common import synthetic_frame
+
+import indicator_kernel  # noqa: E402
+from backtest import backtest_pair, signal_arrays  # noqa: E402
+from bar_buffer import frame_to_arrays  # noqa: E402
+from market_analyzer import MarketAnalyzer, TIMEFRAMES  # noqa: E402
+
+BARS_PER_DAY = 288  # 5-minute bars
+SIGNALS = {'BUY': 1, 'SELL': -1, 'NEUTRAL': 0}
+
+def check_golden(analyzer, df, samples, rng):
+    close = df['Close'].to_numpy()
+    volume = df['Volume'].to_numpy()
+    full = indicator_kernel.compute_all(close)
+    failures = []
+    for bars in (1, 3, 6):
+        vectorized = signal_arrays(close, volume, bars, analyzer.signal_params, indicators=full)
+        for t in rng.integers(bars, close.size, samples):
+            prefix = {name: values[:t + 1] for name, values in full.items()}
+            prefix['close'] = close[:t + 1]
+            prefix['volume'] = volume[:t + 1]
+            signal, _, indicators, error = analyzer.analyze_timeframe(None, bars * 5, prefix, bars=bars)
+            expected = (SIGNALS[signal], indicators['confidence'])
+            actual = (int(vectorized['signal'][t]), round(float(vectorized['confidence'][t]), 1))
+            if error or expected != actual:
+                failures.append(f"bars={bars} t={t}: analyze_timeframe {expected} != vectorized {actual}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=30, help='days of 5-minute history')
+    parser.add_argument('--samples', type=int, default=300, help='bars checked per timeframe')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    df = synthetic_frame(args.days * BARS_PER_DAY, freq='5min', seed=7)
+    analyzer = MarketAnalyzer('EURUSD=X')
+    failures = check_golden(analyzer, df, args.samples, np.random.default_rng(0))
+    if failures:
+        print("Golden-output check FAILED:")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"Golden-output check passed ({3 * args.samples} sampled bars)")
+
+    timestamps, values = frame_to_arrays(df)
+    started = time.perf_counter()
+    backtest_pair(timestamps, values, TIMEFRAMES)
+    vectorized = time.perf_counter() - started
+
+    # analyze_timeframe on the trailing window a live request would see, per bar and timeframe
+    window = df.tail(65)
+    started = time.perf_counter()
+    calls = 50
+    for _ in range(calls):
+        analyzer.analyze_timeframe(window, 30, bars=6)
+    per_call = (time.perf_counter() - started) / calls
+    loop = per_call * len(df) * len(TIMEFRAMES)
+
+    print(f"{len(df)} bars x {len(TIMEFRAMES)} timeframes:")
+    print(f"  vectorized backtest:    {vectorized * 1000:10.1f} ms")
+    print(f"  bar-by-bar (estimated): {loop * 1000:10.1f} ms")
+    print(f"  speedup: {loop / vectorized:.0f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""RSS comparison: per-request DataFrames vs BarBuffer ring buffers.
+
+Loads synthetic 5-minute bars for every symbol in CURRENCY_PAIRS, once
+the way get_market_data holds them (cached 5m frame plus the interpolated
+1-minute request frame) and once as BarBuffers, each mode in a fresh
+interpreter, and reports the resident memory each one adds.
+
+    python benchmarks/bench_bar_memory.py [--days 1]
+"""
+import argparse
+import gc
+import json
+import subprocess
+import sys
+
+import psutil
+
+from common import synthetic_frame
+
+from bar_buffer import BarBuffer  # noqa: E402
+from config import CURRENCY_PAIRS  # noqa: E402
+
+BARS_PER_DAY = 288  # 5-minute bars
+
+def rss():
+    gc.collect()
+    return psutil.Process().memory_info().rss
+
+def load_frames(symbols, bars):
+    held = []
+    for seed, symbol in enumerate(symbols):
+        cached = synthetic_frame(bars, freq='5min', seed=seed)
+        request = cached.resample('1min').interpolate(method='time')
+        held.append((cached, request))
+    return held
+
+def load_buffers(symbols, bars):
+    held = []
+    for seed, symbol in enumerate(symbols):
+        held.append(BarBuffer.from_frame(synthetic_frame(bars, freq='5min', seed=seed), capacity=bars))
+    return held
+
+def measure(mode, days):
+    symbols = list(CURRENCY_PAIRS.values())
+    bars = days * BARS_PER_DAY
+    # Build and drop one set first so allocator warm-up is not counted
+    (load_frames if mode == 'frames' else load_buffers)(symbols[:1], bars)
+    before = rss()
+    held = (load_frames if mode == 'frames' else load_buffers)(symbols, bars)
+    after = rss()
+    return {'mode': mode, 'symbols': len(held), 'bars': bars, 'rss_bytes': after - before}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=1, help='days of 5-minute bars per symbol')
+    parser.add_argument('--mode', choices=['frames', 'buffers'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.days)))
+        return
+
+    results = {}
+    for mode in ('frames', 'buffers'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--days', str(args.days)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    frames, buffers = results['frames'], results['buffers']
+    print(f"{frames['symbols']} symbols x {frames['bars']} 5-minute bars")
+    print(f"  DataFrame path: {frames['rss_bytes'] / 1024:10.0f} KiB RSS")
+    print(f"  BarBuffer path: {buffers['rss_bytes'] / 1024:10.0f} KiB RSS")
+    if buffers['rss_bytes'] > 0:
+        print(f"  ratio: {frames['rss_bytes'] / buffers['rss_bytes']:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Per-chart latency of the template renderer against create_analysis_image.
+
+Both draw the same synthetic analysis (the bot's 30 bars, EMA 7/21 and
+volume). The template renderer builds its styled Figure and Agg canvas
+once and only swaps data per chart; create_analysis_image builds and
+styles a new pyplot figure every time. Exits with status 1 when the
+template is not faster at p50.
+
+    python benchmarks/bench_chart.py [--charts 20] [--bars 30]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from common import synthetic_frame
+
+import matplotlib  # noqa: E402
+matplotlib.use('Agg')
+
+from generate_sample import ChartTemplate, chart_arrays, create_analysis_image  # noqa: E402
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def time_charts(render, frames):
+    timings = []
+    for frame in frames:
+        started = time.perf_counter()
+        png = render(frame)
+        timings.append(time.perf_counter() - started)
+        if not png or not png.startswith(PNG_SIGNATURE):
+            raise SystemExit("Renderer did not return a PNG")
+    return np.array(timings) * 1000
+
+def report(name, timings):
+    p50, p90 = np.percentile(timings, (50, 90))
+    print(f"{name:24} p50 {p50:8.1f} ms  p90 {p90:8.1f} ms  max {timings.max():8.1f} ms")
+    return p50
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--charts', type=int, default=20, help='charts per renderer')
+    parser.add_argument('--bars', type=int, default=30, help='bars per chart')
+    args = parser.parse_args()
+
+    frames = [synthetic_frame(args.bars, freq='5min', seed=seed) for seed in range(args.charts)]
+    template = ChartTemplate()
+    # Warm-up: font cache and the template's first draw
+    create_analysis_image(None, frames[0])
+    template.render(**chart_arrays(None, frames[0]))
+
+    baseline = report('create_analysis_image', time_charts(lambda df: create_analysis_image(None, df), frames))
+    templated = report('ChartTemplate.render', time_charts(lambda df: template.render(**chart_arrays(None, df)), frames))
+    print(f"\nSpeed-up at p50: {baseline / templated:.2f}x")
+    if templated >= baseline:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
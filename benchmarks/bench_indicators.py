@@ -0,0 +1,79 @@
+"""Golden-output check and benchmark for the NumPy indicator kernel.
+
+Compares indicator_kernel against the pandas calculate_* methods of
+MarketAnalyzer, then times one analyze_timeframe call (indicators
+included) with each engine.
+
+    python benchmarks/bench_indicators.py [--bars 65] [--repeat 2000]
+"""
+import argparse
+import sys
+import timeit
+
+import numpy as np
+
+from common import synthetic_frame
+
+import indicator_kernel  # noqa: E402
+from market_analyzer import MarketAnalyzer  # noqa: E402
+
+RTOL = 1e-9
+ATOL = 1e-12
+
+def check_golden(analyzer, lengths=(1, 5, 14, 20, 26, 65, 300, 5000)):
+    failures = []
+    for bars in lengths:
+        close = synthetic_frame(bars, seed=bars)['Close']
+        kernel = indicator_kernel.compute_all(close.to_numpy())
+        reference = analyzer._compute_indicators_pandas(close)
+        for name in indicator_kernel.INDICATOR_NAMES:
+            if not np.allclose(kernel[name], reference[name], rtol=RTOL, atol=ATOL, equal_nan=True):
+                diff = np.nanmax(np.abs(kernel[name] - reference[name]))
+                failures.append(f"{name} ({bars} bars): max abs diff {diff:.3e}")
+    return failures
+
+def check_signals(bars, timeframes=(1, 5, 15, 30)):
+    failures = []
+    df = synthetic_frame(bars, seed=42)
+    numpy_analyzer = MarketAnalyzer('BENCH')
+    pandas_analyzer = MarketAnalyzer('BENCH')
+    pandas_analyzer.indicator_engine = 'pandas'
+    for minutes in timeframes:
+        fast = numpy_analyzer.analyze_timeframe(df, minutes)
+        slow = pandas_analyzer.analyze_timeframe(df, minutes)
+        if fast[0] != slow[0] or fast[2] != slow[2]:
+            failures.append(f"analyze_timeframe({minutes}): {fast} != {slow}")
+    return failures
+
+def bench_engine(engine, df, minutes, repeat):
+    analyzer = MarketAnalyzer('BENCH')
+    analyzer.indicator_engine = engine
+    timer = timeit.Timer(lambda: analyzer.analyze_timeframe(df, minutes))
+    timer.timeit(number=min(repeat, 50))  # warm-up
+    return min(timer.repeat(repeat=5, number=repeat)) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=65, help='bars per frame (default: 30 + warm-up)')
+    parser.add_argument('--minutes', type=int, default=30, help='timeframe passed to analyze_timeframe')
+    parser.add_argument('--repeat', type=int, default=2000, help='calls per timing run')
+    args = parser.parse_args()
+
+    failures = check_golden(MarketAnalyzer('BENCH')) + check_signals(args.bars)
+    if failures:
+        print("Golden-output check FAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"Golden-output check passed (rtol={RTOL}, atol={ATOL})")
+
+    df = synthetic_frame(args.bars)
+    pandas_time = bench_engine('pandas', df, args.minutes, args.repeat)
+    numpy_time = bench_engine('numpy', df, args.minutes, args.repeat)
+    print(f"analyze_timeframe({args.minutes}) on {args.bars} bars:")
+    print(f"  pandas: {pandas_time * 1e6:8.1f} us/call")
+    print(f"  numpy:  {numpy_time * 1e6:8.1f} us/call")
+    print(f"  speedup: {pandas_time / numpy_time:.1f}x")
+
+if __name__ == '__main__':
+    main()
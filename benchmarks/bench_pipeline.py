@@ -0,0 +1,213 @@
+"""Latency and memory benchmark for the analysis and signal pipeline.
+
+Replays synthetic 5-minute bars for every pair in CURRENCY_PAIRS through
+the ReplayProvider (frozen clock, no network, no bar store) and measures
+analyze_timeframe, analyze_market (computed and from the signal cache),
+format_signal_message, get_signal_message and create_analysis_image per pair. Reports latency percentiles plus peak
+traced memory and net allocated blocks per call, and writes everything
+to a JSON file that a later run can be compared against:
+
+    python benchmarks/bench_pipeline.py --output before.json
+    python benchmarks/bench_pipeline.py --compare before.json [--threshold 10]
+
+With --compare the exit status is 1 when a stage's p50 latency or peak
+memory got worse by more than the threshold (percent).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from common import ROOT, synthetic_frame
+
+# Keep replayed bars out of the live bar store; must be set before market_analyzer is imported
+os.environ['BAR_STORE_DIR'] = ''
+
+import matplotlib  # noqa: E402
+matplotlib.use('Agg')
+
+from config import CURRENCY_PAIRS, LANGUAGES  # noqa: E402
+from generate_sample import create_analysis_image  # noqa: E402
+from market_analyzer import MarketAnalyzer  # noqa: E402
+from market_data import signal_cache  # noqa: E402
+from market_providers import ReplayProvider, set_provider, write_replay_file  # noqa: E402
+from utils import format_signal_message, get_signal_message  # noqa: E402
+
+REPLAY_DAYS = 3
+BARS_PER_DAY = 288  # 5-minute bars
+CHART_BARS = 30  # what the bot draws
+PERCENTILES = (50, 90, 99)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def record_pairs(directory):
+    start = pd.Timestamp.now(tz='UTC').floor('1D') - pd.Timedelta(days=30)
+    for seed, symbol in enumerate(CURRENCY_PAIRS.values()):
+        df = synthetic_frame(REPLAY_DAYS * BARS_PER_DAY, freq='5min', seed=seed)
+        df.index = pd.date_range(start=start, periods=len(df), freq='5min', name='Datetime')
+        write_replay_file(directory, symbol, df)
+
+def uncached_analysis(analyzer):
+    signal_cache.invalidate(analyzer.symbol)
+    return analyzer.analyze_market()
+
+def time_calls(fn, args_list, repeat):
+    timings = []
+    for _ in range(repeat):
+        for args in args_list:
+            started = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - started)
+    return np.array(timings)
+
+def trace_calls(fn, args_list):
+    """Peak traced bytes and net allocated blocks per call, measured without timing"""
+    peaks, blocks = [], []
+    for args in args_list:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        peaks.append(peak)
+        blocks.append(sum(stat.count_diff for stat in after.compare_to(before, 'filename')))
+    return np.array(peaks), np.array(blocks)
+
+def measure(name, fn, args_list, repeat):
+    fn(*args_list[0])  # warm-up: imports, caches, font loading
+    timings = time_calls(fn, args_list, repeat) * 1000
+    peaks, blocks = trace_calls(fn, args_list)
+    result = {
+        'calls': len(timings),
+        'mean_ms': float(timings.mean()),
+        'max_ms': float(timings.max()),
+        'peak_kib': float(peaks.mean() / 1024),
+        'alloc_blocks': float(blocks.mean()),
+    }
+    for p in PERCENTILES:
+        result[f'p{p}_ms'] = float(np.percentile(timings, p))
+    print(
+        f"{name:24} p50 {result['p50_ms']:9.3f} ms  p90 {result['p90_ms']:9.3f} ms  "
+        f"p99 {result['p99_ms']:9.3f} ms  peak {result['peak_kib']:9.1f} KiB  "
+        f"blocks {result['alloc_blocks']:8.0f}"
+    )
+    return result
+
+def run(repeat, image_repeat):
+    workdir = tempfile.mkdtemp(prefix='bench-pipeline-')
+    record_pairs(os.path.join(workdir, 'replay'))
+    set_provider(ReplayProvider(os.path.join(workdir, 'replay'), speed=0))
+
+    pairs = list(CURRENCY_PAIRS.items())
+    analyzers = {pair: MarketAnalyzer(symbol) for pair, symbol in pairs}
+    results = {pair: analyzers[pair].analyze_market() for pair, _ in pairs}
+    failed = [pair for pair, result in results.items() if 'error' in result]
+    if failed:
+        raise SystemExit(f"Analysis failed for {failed}")
+
+    frames = {pair: synthetic_frame(65, seed=seed) for seed, (pair, _) in enumerate(pairs)}
+    stages = {
+        'analyze_timeframe': measure(
+            'analyze_timeframe', lambda pair: analyzers[pair].analyze_timeframe(frames[pair], 30),
+            [(pair,) for pair, _ in pairs], repeat
+        ),
+        'analyze_market': measure(
+            'analyze_market', lambda pair: uncached_analysis(analyzers[pair]),
+            [(pair,) for pair, _ in pairs], repeat
+        ),
+        'analyze_market_cached': measure(
+            'analyze_market_cached', lambda pair: analyzers[pair].analyze_market(),
+            [(pair,) for pair, _ in pairs], repeat
+        ),
+        'format_signal_message': measure(
+            'format_signal_message', format_signal_message,
+            [(pair, results[pair], lang) for pair, _ in pairs for lang in LANGUAGES], repeat
+        ),
+        'get_signal_message': measure(
+            'get_signal_message', get_signal_message,
+            [(pair, results[pair], lang) for pair, _ in pairs for lang in LANGUAGES], repeat
+        ),
+        'create_analysis_image': measure(
+            'create_analysis_image',
+            lambda pair: create_analysis_image(results[pair], results[pair]['market_data'].tail(CHART_BARS), 'ru'),
+            [(pair,) for pair, _ in pairs], image_repeat
+        ),
+    }
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'pairs': len(pairs),
+            'repeat': repeat,
+        },
+        'stages': stages,
+    }
+
+def compare(baseline, current, threshold):
+    """Print per-stage changes; returns the regressions beyond threshold percent"""
+    regressions = []
+    print(f"\nAgainst {baseline['meta'].get('commit')} ({baseline['meta'].get('created')}):")
+    for stage, now in current['stages'].items():
+        before = baseline['stages'].get(stage)
+        if before is None:
+            print(f"  {stage:24} new stage")
+            continue
+        changes = []
+        for metric in ('p50_ms', 'p99_ms', 'peak_kib'):
+            change = (now[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            changes.append(f"{metric} {change:+6.1f}%")
+            if metric != 'p99_ms' and change > threshold:
+                regressions.append(f"{stage} {metric} {change:+.1f}%")
+        print(f"  {stage:24} " + "  ".join(changes))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='passes over all pairs per stage')
+    parser.add_argument('--image-repeat', type=int, default=1, help='passes for create_analysis_image')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline JSON from an earlier run')
+    parser.add_argument('--threshold', type=float, default=10.0, help='regression threshold in percent')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    current = run(args.repeat, args.image_repeat)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults written to {output}")
+
+    if baseline is not None:
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print("\nRegressions: " + ", ".join(regressions))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
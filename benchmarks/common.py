@@ -0,0 +1,24 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def synthetic_frame(bars, freq='1min', seed=0, start_price=1.1):
+    """Random-walk OHLCV frame indexed by 'Datetime', like the provider frames"""
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 5e-4, bars)))
+    open_ = np.r_[close[0], close[:-1]]
+    index = pd.date_range(end=pd.Timestamp.now(tz='UTC').floor(freq), periods=bars, freq=freq, name='Datetime')
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * 1.0002,
+        'Low': np.minimum(open_, close) * 0.9998,
+        'Close': close,
+        'Volume': rng.integers(100, 1000, bars).astype(float)
+    }, index=index)
@@ -10,15 +10,15 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, MessageHandler, filters, ConversationHandler
 from config import *
-from market_analyzer import MarketAnalyzer
-from utils import get_currency_keyboard, get_language_keyboard, format_signal_message
-try:
-    from generate_sample import create_analysis_image
-except ImportError:
-    logging.error("Could not import generate_sample module. Chart generation will be disabled.")
-    def create_analysis_image(*args, **kwargs):
-        logging.warning("Chart generation is disabled due to missing module")
-        return False
+from market_analyzer import MarketAnalyzer, fetch_batch_async, get_market_scan_async
+from market_correlation import get_market_correlation_async, top_correlations
+from market_data import circuit_breakers
+from market_providers import get_provider
+from market_refresher import start_market_refresher
+from utils import get_currency_keyboard, get_language_keyboard, get_signal_message
+from chart_renderer import chart_cache, chart_renderer
+from create_welcome_image import welcome_image
+from generate_sample import DEFAULT_CHART_THEME
 from datetime import datetime, timedelta
 import json
 import platform
@@ -107,9 +107,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 [InlineKeyboardButton("🌐 Сменить язык", callback_data="change_language")]
             ])
             
-            # Пытаемся создать и отправить приветственное изображение
-            from create_welcome_image import create_welcome_image
-            
+            # Пытаемся отправить приветственное изображение
             welcome_text = f"🚀 *Приветствуем, @{username}!*\n\n" \
                           "🔹 *Продвинутый бот анализа финансовых рынков!*\n\n" \
                           "📊 Основные возможности:\n" \
@@ -118,7 +116,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                           "• ⚡️ Мгновенные сигналы с точностью до 95%\n" \
                           "• 📱 Поддержка 5 языков\n" \
                           "• 📊 Чёткие и подробные графики\n" \
-                          "• ⏱ Анализ на разных интервалах (1, 5, 15, 30 минут)\n\n" \
+                          "• ⏱ Анализ на разных интервалах (5, 15, 30 минут)\n\n" \
                           "💎 Валютные пары:\n" \
                           "• 🏆 Основные пары: EUR/USD, GBP/USD, USD/JPY и другие\n" \
                           "• 🌟 Кросс-курсы: EUR/GBP, GBP/JPY, EUR/JPY и другие\n" \
@@ -133,16 +131,13 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
                           "📞 *Техническая поддержка:* @tradeporu"
             
             try:
-                # Создаем и отправляем изображение
-                if create_welcome_image():
-                    with open('welcome_image.png', 'rb') as photo:
-                        await update.message.reply_photo(
-                            photo=photo,
-                            caption=welcome_text,
-                            reply_markup=register_keyboard,
-                            parse_mode='MarkdownV2'  # Добавляем поддержку разметки для нового приветствия
-                        )
-                else:
+                # Отправляем готовое изображение (file_id или PNG из памяти)
+                if not await reply_with_welcome_image(
+                    update.message,
+                    caption=welcome_text,
+                    reply_markup=register_keyboard,
+                    parse_mode='MarkdownV2'  # Добавляем поддержку разметки для нового приветствия
+                ):
                     # Если изображение не создалось, отправляем текст
                     await update.message.reply_text(
                         welcome_text,
@@ -397,6 +392,80 @@ async def handle_language_selection(update: Update, context: ContextTypes.DEFAUL
         logger.error(f"Language selection error: {str(e)}")
         await query.answer("❌ Error processing language change")
 
+async def reply_with_welcome_image(message, **kwargs):
+    """Отправляет приветственное изображение; False, если изображения нет.
+
+    Изображение строится один раз, а после первой отправки используется
+    его file_id в Telegram.
+    """
+    photo = welcome_image.file_id
+    if photo:
+        try:
+            await message.reply_photo(photo=photo, **kwargs)
+            return True
+        except Exception as e:
+            # file_id больше не принимается — загружаем PNG заново
+            logger.warning(f"Welcome image file_id rejected: {e}")
+            welcome_image.forget_file_id()
+
+    loop = asyncio.get_running_loop()
+    png = await loop.run_in_executor(None, welcome_image.load)
+    if png is None:
+        return False
+    sent = await message.reply_photo(photo=png, **kwargs)
+    if sent.photo:
+        welcome_image.set_file_id(sent.photo[-1].file_id)
+    return True
+
+# Рендеры графиков в процессе по chart_key: одновременные промахи кэша ждут один рендер
+_chart_renders = {}
+
+async def _render_and_cache_chart(chart_key, analysis_result, market_data, lang_code, theme):
+    photo = await chart_renderer.render_analysis(analysis_result, market_data, lang_code, theme)
+    if photo is not None:
+        chart_cache.put(chart_key, photo)
+    return photo
+
+async def render_chart_once(chart_key, analysis_result, market_data, lang_code, theme=DEFAULT_CHART_THEME):
+    """PNG графика для chart_key (None при ошибке); одновременные запросы делят один рендер"""
+    task = _chart_renders.get(chart_key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _render_and_cache_chart(chart_key, analysis_result, market_data, lang_code, theme)
+        )
+        _chart_renders[chart_key] = task
+        task.add_done_callback(lambda _: _chart_renders.pop(chart_key, None))
+    # Отмена одного ожидающего не отменяет общий рендер
+    return await asyncio.shield(task)
+
+async def reply_with_chart(message, analysis_result, market_data, lang_code, theme=DEFAULT_CHART_THEME, **kwargs):
+    """Ответ графиком анализа из кэша графиков.
+
+    График одного бара рендерится один раз; после первой отправки
+    повторно используется file_id Telegram без рендера и загрузки.
+    """
+    chart_key = (analysis_result['symbol'], analysis_result['bar_time'], lang_code, theme)
+    photo = chart_cache.photo(chart_key)
+    if isinstance(photo, str):
+        try:
+            return await message.reply_photo(photo=photo, **kwargs)
+        except Exception as e:
+            # file_id больше не принимается — отправляем сохранённые байты
+            logger.warning(f"Cached chart file_id rejected: {e}")
+            chart_cache.forget_file_id(chart_key)
+            photo = chart_cache.photo(chart_key)
+
+    if photo is None:
+        # График рендерится в пуле процессов и отправляется из памяти
+        photo = await render_chart_once(chart_key, analysis_result, market_data, lang_code, theme)
+        if photo is None:
+            raise RuntimeError("chart rendering failed")
+
+    sent = await message.reply_photo(photo=photo, **kwargs)
+    if sent.photo:
+        chart_cache.set_file_id(chart_key, sent.photo[-1].file_id)
+    return sent
+
 async def button_click(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -549,6 +618,15 @@ async def button_click(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await query.answer("Выберите конкретную валютную пару из списка")
             return
             
+        # Сканер рынка: общий рейтинг сигналов по всем парам
+        if query.data == "market_scan":
+            await handle_market_scan(update, context)
+            return
+
+        if query.data == "currency_strength":
+            await handle_currency_strength(update, context)
+            return
+
         # Обработка OTC Pocket Option кнопок
         if query.data == "otc_pairs":
             await handle_otc_pairs(update, context)
@@ -990,29 +1068,28 @@ async def button_click(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             analyzer = MarketAnalyzer(symbol)
             analyzer.set_language(lang_code)
-            analysis_result = analyzer.analyze_market()
+            analysis_result = await analyzer.analyze_market_async()
 
             if not analysis_result or 'error' in analysis_result:
                 error_msg = analysis_result.get('error', MESSAGES[lang_code]['ERRORS']['ANALYSIS_ERROR'])
                 await analyzing_message.edit_text(error_msg, parse_mode='MarkdownV2')
                 return
 
-            market_data, error_message = analyzer.get_market_data(minutes=30)
-            if error_message or market_data is None or market_data.empty:
+            # График строится по тем же данным, что и анализ, без повторной загрузки
+            market_data = analysis_result['market_data'].tail(30)
+            if market_data.empty:
                 await analyzing_message.edit_text(MESSAGES[lang_code]['ERRORS']['NO_DATA'])
                 return
 
-            result_message = format_signal_message(pair, analysis_result, lang_code)
+            result_message = get_signal_message(pair, analysis_result, lang_code)
 
             try:
-                create_analysis_image(analysis_result, market_data, lang_code)
-                with open('analysis_sample.png', 'rb') as photo:
-                    await query.message.reply_photo(
-                        photo=photo,
-                        caption=result_message,
-                        parse_mode='MarkdownV2',
-                        reply_markup=get_currency_keyboard(current_lang=lang_code, user_data=user_data)
-                    )
+                await reply_with_chart(
+                    query.message, analysis_result, market_data, lang_code,
+                    caption=result_message,
+                    parse_mode='MarkdownV2',
+                    reply_markup=get_currency_keyboard(current_lang=lang_code, user_data=user_data)
+                )
                 await analyzing_message.delete()
             except Exception as img_error:
                 logger.error(f"Chart error: {str(img_error)}")
@@ -2315,18 +2392,10 @@ async def register_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     support_text = support_messages.get(lang_code, support_messages['tg'])
     message += support_text
     
-    # Пробуем создать и отправить изображение
-    from create_welcome_image import create_welcome_image
+    # Пробуем отправить приветственное изображение
     try:
-        # Создаем изображение
-        if create_welcome_image():
-            # Отправляем изображение с новым текстом
-            with open('welcome_image.png', 'rb') as photo:
-                await update.message.reply_photo(
-                    photo=photo,
-                    caption=message
-                )
-        else:
+        # Отправляем изображение с новым текстом
+        if not await reply_with_welcome_image(update.message, caption=message):
             # Если не удалось создать изображение, просто отправляем текст
             await update.message.reply_text(message)
     except Exception as e:
@@ -2358,6 +2427,15 @@ async def register_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return ConversationHandler.END
 
+async def warm_up_market_data(application):
+    """Заполняем кэш котировок всех пар одним пакетным запросом при запуске"""
+    # Процессы для графиков запускаются заранее, а не на первом запросе графика
+    chart_renderer.start()
+    application.create_task(fetch_batch_async(list(CURRENCY_PAIRS.values())))
+    # Приветственное изображение строится один раз при запуске, а не на каждый /start
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, welcome_image.load)
+
 def main():
     reconnect_delay = 5  # Start with 5 seconds delay
     max_reconnect_delay = 30  # Maximum delay between reconnection attempts
@@ -2378,7 +2456,10 @@ def main():
                 continue
 
             # Создание приложения с токеном
-            application = Application.builder().token(BOT_TOKEN).build()
+            application = Application.builder().token(BOT_TOKEN).post_init(warm_up_market_data).build()
+
+            # Фоновое обновление котировок активных пар после закрытия каждого бара
+            start_market_refresher(application)
 
             # Add handlers
             application.add_handler(CommandHandler("start", start))
@@ -3493,7 +3574,24 @@ def main():
                     status_text += f"• Пользователей: {len(users)}\n"
                     active_users = len([u for u in users if u.get('is_approved')])
                     status_text += f"• Активных: {active_users}\n"
-                    status_text += f"• Процессов: {len(psutil.pids())}\n"
+                    status_text += f"• Процессов: {len(psutil.pids())}\n\n"
+
+                    # Источник рыночных данных и предохранители (provider, symbol)
+                    breakers = circuit_breakers.stats()
+                    failing = [b for b in breakers if b['state'] != 'closed']
+                    status_text += "<b>Рыночные данные:</b>\n"
+                    status_text += f"• Источник: {get_provider().name}\n"
+                    status_text += f"• Предохранители: {len(breakers) - len(failing)} закрыто, {len(failing)} открыто\n"
+                    for b in failing[:MARKET_STATUS_BREAKERS]:
+                        open_for = int(b['open_for'] or 0)
+                        status_text += f"  ⚠️ {b['name']}: {b['state']}, ошибок {b['failures']}, {open_for // 60}м {open_for % 60}с\n"
+                    if len(failing) > MARKET_STATUS_BREAKERS:
+                        status_text += f"  … и ещё {len(failing) - MARKET_STATUS_BREAKERS}\n"
+                    stale = [b for b in breakers if b['stale_served']]
+                    if stale:
+                        oldest = max(b['stale_age'] for b in stale)
+                        status_text += f"• Устаревших анализов выдано: {sum(b['stale_served'] for b in stale)}"
+                        status_text += f" (возраст до {int(oldest // 60)} мин)\n"
                     
                 except Exception as e:
                     import traceback
@@ -7335,6 +7433,131 @@ async def show_strategy_details(update: Update, context: ContextTypes.DEFAULT_TY
     )
 
 
+MARKET_STATUS_BREAKERS = 10  # открытых предохранителей в статусе сервера
+MARKET_SCAN_TOP = 10  # пар в рейтинге сканера
+MARKET_SCAN_BUTTONS = 4  # пар из рейтинга с кнопкой полного анализа
+
+async def handle_market_scan(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик сканера рынка: сильнейшие сигналы по всем парам.
+
+    Рейтинг считается один раз за бар для всех пользователей (get_market_scan),
+    здесь он только форматируется.
+    """
+    query = update.callback_query
+    user_id = update.effective_user.id
+
+    try:
+        user_data = get_user(user_id)
+        if not user_data or not user_data.get('is_approved'):
+            await query.answer("⛔ У вас нет доступа к этой функции. Отправьте заявку на регистрацию.")
+            return
+
+        lang_code = user_data.get('language_code', 'tg')
+        scan_texts = {
+            'tg': {'title': '🔍 *Сканери бозор*', 'subtitle': 'Сигналҳои пурқувваттарин ({} дақ.)',
+                   'bar': 'Бар', 'empty': 'Ҳоло сигнали возеҳ нест.', 'back': '↩️ Ба саҳифаи аввал',
+                   'strength': '💪 Қувваи асъорҳо'},
+            'ru': {'title': '🔍 *Сканер рынка*', 'subtitle': 'Сильнейшие сигналы ({} мин.)',
+                   'bar': 'Бар', 'empty': 'Сейчас явных сигналов нет.', 'back': '↩️ Назад в главное меню',
+                   'strength': '💪 Сила валют'},
+            'uz': {'title': '🔍 *Bozor skaneri*', 'subtitle': 'Eng kuchli signallar ({} daq.)',
+                   'bar': 'Bar', 'empty': 'Hozircha aniq signal yo\'q.', 'back': '↩️ Bosh sahifaga',
+                   'strength': '💪 Valyutalar kuchi'},
+            'kk': {'title': '🔍 *Нарық сканері*', 'subtitle': 'Ең күшті сигналдар ({} мин.)',
+                   'bar': 'Бар', 'empty': 'Қазір айқын сигнал жоқ.', 'back': '↩️ Басты бетке',
+                   'strength': '💪 Валюталар күші'},
+            'en': {'title': '🔍 *Market Scanner*', 'subtitle': 'Strongest signals now ({} min)',
+                   'bar': 'Bar', 'empty': 'No clear signals right now.', 'back': '↩️ Return to Main',
+                   'strength': '💪 Currency Strength'}
+        }
+        texts = scan_texts.get(lang_code, scan_texts['ru'])
+
+        scan = await get_market_scan_async()
+        entries = [entry for entry in scan['entries'] if entry['signal'] != 'NEUTRAL'][:MARKET_SCAN_TOP]
+
+        lines = [texts['title'], texts['subtitle'].format(scan['minutes'])]
+        if scan['bar_time'] is not None:
+            lines.append(f"🕒 {texts['bar']}: {scan['bar_time'].strftime('%H:%M')} UTC")
+        lines.append("")
+        if not entries:
+            lines.append(texts['empty'])
+        for place, entry in enumerate(entries, 1):
+            arrow = '🟢 ⬆️' if entry['signal'] == 'BUY' else '🔴 ⬇️'
+            lines.append(
+                f"{place}. {arrow} {entry['pair']} — {entry['confidence']:.0f}% · RSI {entry['rsi']:.1f}"
+            )
+
+        keyboard = []
+        top_pairs = [entry['pair'] for entry in entries[:MARKET_SCAN_BUTTONS]]
+        for i in range(0, len(top_pairs), 2):
+            keyboard.append([InlineKeyboardButton(pair, callback_data=pair) for pair in top_pairs[i:i + 2]])
+        keyboard.append([InlineKeyboardButton(texts['strength'], callback_data="currency_strength")])
+        keyboard.append([InlineKeyboardButton(texts['back'], callback_data="return_to_main")])
+
+        await query.edit_message_text(
+            "\n".join(lines),
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode='Markdown'
+        )
+
+    except Exception as e:
+        logger.error(f"Error in market scan handler: {e}")
+        await query.answer(f"Произошла ошибка: {str(e)}")
+
+CURRENCY_STRENGTH_CORRELATIONS = 5  # самых коррелированных пар в сводке
+
+async def handle_currency_strength(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик силы валют и корреляций пар.
+
+    Данные берутся из общего кэша correlation_engine, который обновляется
+    инкрементально на каждом новом баре.
+    """
+    query = update.callback_query
+    user_id = update.effective_user.id
+
+    try:
+        user_data = get_user(user_id)
+        if not user_data or not user_data.get('is_approved'):
+            await query.answer("⛔ У вас нет доступа к этой функции. Отправьте заявку на регистрацию.")
+            return
+
+        lang_code = user_data.get('language_code', 'tg')
+        strength_texts = {
+            'tg': {'title': '💪 *Қувваи асъорҳо* (4 соат)', 'correlation': '🔗 *Коррелятсияи ҷуфтҳо* (24 соат)',
+                   'bar': 'Бар', 'back': '↩️ Ба сканер'},
+            'ru': {'title': '💪 *Сила валют* (4 часа)', 'correlation': '🔗 *Корреляции пар* (24 часа)',
+                   'bar': 'Бар', 'back': '↩️ К сканеру'},
+            'uz': {'title': '💪 *Valyutalar kuchi* (4 soat)', 'correlation': '🔗 *Juftliklar korrelyatsiyasi* (24 soat)',
+                   'bar': 'Bar', 'back': '↩️ Skanerga'},
+            'kk': {'title': '💪 *Валюталар күші* (4 сағат)', 'correlation': '🔗 *Жұптар корреляциясы* (24 сағат)',
+                   'bar': 'Бар', 'back': '↩️ Сканерге'},
+            'en': {'title': '💪 *Currency Strength* (4h)', 'correlation': '🔗 *Pair Correlations* (24h)',
+                   'bar': 'Bar', 'back': '↩️ Back to Scanner'}
+        }
+        texts = strength_texts.get(lang_code, strength_texts['ru'])
+
+        snapshot = await get_market_correlation_async()
+
+        lines = [texts['title'], f"🕒 {texts['bar']}: {snapshot['bar_time'].strftime('%H:%M')} UTC", ""]
+        for item in snapshot['strength']:
+            marker = '🟢' if item['strength'] > 0 else '🔴' if item['strength'] < 0 else '⚪'
+            lines.append(f"{marker} {item['currency']}: {item['strength']:+.2f}%")
+
+        lines.extend(["", texts['correlation']])
+        for pair_a, pair_b, value in top_correlations(snapshot, CURRENCY_STRENGTH_CORRELATIONS):
+            lines.append(f"{pair_a} ↔ {pair_b}: {value:+.2f}")
+
+        keyboard = [[InlineKeyboardButton(texts['back'], callback_data="market_scan")]]
+        await query.edit_message_text(
+            "\n".join(lines),
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode='Markdown'
+        )
+
+    except Exception as e:
+        logger.error(f"Error in currency strength handler: {e}")
+        await query.answer(f"Произошла ошибка: {str(e)}")
+
 async def handle_otc_pairs(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик для OTC Pocket Option пар"""
     query = update.callback_query
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from generate_sample import DEFAULT_CHART_THEME, chart_arrays, render_template_chart
+
+logger = logging.getLogger(__name__)
+
+CHART_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))  # render processes
+CHART_QUEUE_SIZE = 16  # charts queued or rendering before new requests are refused
+CHART_TIMEOUT = 15  # seconds a caller waits for one chart
+CHART_HUNG_GRACE = 30  # extra seconds a timed-out job may run before the workers are restarted
+CHART_CACHE_SIZE = 128  # (symbol, bar, language, theme) charts kept in memory
+
+def _init_worker():
+    """Pool initializer: pick the Agg backend and build the default chart template before the first job"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from generate_sample import ChartTemplate, _templates
+    _templates[DEFAULT_CHART_THEME] = ChartTemplate(DEFAULT_CHART_THEME)
+
+def _ping():
+    return os.getpid()
+
+class ChartRenderer:
+    """Renders analysis charts in a dedicated process pool.
+
+    pyplot keeps global state and a chart costs hundreds of milliseconds of
+    CPU, so rendering runs in worker processes, each holding its own
+    ChartTemplate per theme that is only refilled with data per chart.
+    The workers are forked explicitly (not the platform default): spawned
+    or forkserver workers would re-import bot.py and with it the database
+    setup in models. The bot process already runs threads (keep-alive
+    server, executors) when the pool forks, so workers must only run the
+    rendering code, which takes none of the parent's locks.
+    Jobs are the compact arrays from chart_arrays(); the result is PNG
+    bytes. At most ``queue_size`` jobs are queued or running: beyond that,
+    and when a job takes longer than ``timeout``, render() returns None and
+    the caller answers without a chart. A timed-out job keeps its slot; if
+    it is still running ``hung_grace`` seconds later, its workers are
+    terminated and a new pool is started, so hung renders cannot fill the
+    queue for good.
+    """
+
+    def __init__(self, workers=CHART_WORKERS, queue_size=CHART_QUEUE_SIZE, timeout=CHART_TIMEOUT,
+                 hung_grace=CHART_HUNG_GRACE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.hung_grace = hung_grace
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rendered = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.restarts = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=_init_worker
+                )
+                logger.info(f"Started chart render pool with {self.workers} workers")
+            return self._pool
+
+    def start(self):
+        """Start the worker processes now instead of on the first chart"""
+        pool = self._get_pool()
+        for _ in range(self.workers):
+            pool.submit(_ping)
+
+    def _job_done(self, _):
+        with self._lock:
+            self._pending -= 1
+
+    async def render(self, arrays, lang_code='tg', theme=DEFAULT_CHART_THEME, timeout=None):
+        """PNG bytes for chart_arrays() output, None when refused, timed out or failed"""
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self.rejected += 1
+                logger.warning(f"Chart queue full ({self._pending} jobs), skipping chart")
+                return None
+            self._pending += 1
+
+        try:
+            pool, future = self._submit(arrays, lang_code, theme)
+        except Exception as e:
+            self._job_done(None)
+            self.failures += 1
+            logger.error(f"Could not queue chart: {str(e)}")
+            return None
+        # The slot is held until the job really finishes, even if the caller gave up
+        future.add_done_callback(self._job_done)
+
+        try:
+            png = await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.error(f"Chart rendering timed out after {timeout or self.timeout}s")
+            asyncio.get_running_loop().call_later(self.hung_grace, self._check_hung, pool, future)
+            return None
+        except BrokenProcessPool:
+            self.failures += 1
+            logger.error("Chart render pool broke, restarting it")
+            self._reset_pool(pool)
+            return None
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Chart rendering failed: {str(e)}")
+            return None
+
+        self.rendered += 1
+        return png
+
+    def _submit(self, arrays, lang_code, theme):
+        """(pool, future) of a queued render job"""
+        pool = self._get_pool()
+        try:
+            return pool, pool.submit(render_template_chart, **arrays, lang_code=lang_code, theme=theme)
+        except BrokenProcessPool:
+            # A worker died since the last job: start a new pool and try once more
+            self._reset_pool(pool)
+            pool = self._get_pool()
+            return pool, pool.submit(render_template_chart, **arrays, lang_code=lang_code, theme=theme)
+
+    def _check_hung(self, pool, future):
+        """Restart the workers of ``pool`` when a timed-out job is still running"""
+        with self._lock:
+            # Already replaced: its workers were terminated, broke or were shut down
+            if future.done() or self._pool is not pool:
+                return
+        logger.error(f"Chart job still running {self.hung_grace}s after its timeout, restarting the render pool")
+        self.restarts += 1
+        self._reset_pool(pool, terminate=True)
+
+    async def render_analysis(self, analysis_result, market_data, lang_code='tg', theme=DEFAULT_CHART_THEME,
+                              timeout=None):
+        """render() for an analysis result and the bars to draw"""
+        return await self.render(chart_arrays(analysis_result, market_data), lang_code, theme, timeout)
+
+    def _reset_pool(self, pool=None, terminate=False):
+        """Drop ``pool`` (the current one by default); terminate also kills its workers"""
+        with self._lock:
+            if pool is None:
+                pool = self._pool
+            if self._pool is pool:
+                self._pool = None
+        if pool is None:
+            return
+        if terminate:
+            # A hung job never returns; killing the workers breaks the pool, which fails its jobs and frees their slots
+            for process in list((pool._processes or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self._reset_pool()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': self._pending,
+                'queue_size': self.queue_size,
+                'rendered': self.rendered,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'failures': self.failures,
+                'restarts': self.restarts,
+            }
+
+chart_renderer = ChartRenderer()
+
+class ChartCache:
+    """LRU cache of rendered charts keyed by (symbol, bar timestamp, language, theme).
+
+    Stores the PNG bytes and, once the chart has been sent, the Telegram
+    file_id of the uploaded photo. photo() prefers the file_id, so later
+    sends of the same chart cost neither rendering nor upload. Charts of
+    older bars of a symbol are dropped when a newer one is stored.
+    """
+
+    def __init__(self, maxsize=CHART_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.file_id_hits = 0
+        self.misses = 0
+
+    def photo(self, key):
+        """Cached file_id or PNG bytes for ``key``, None when it has to be rendered"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if entry['file_id']:
+                self.file_id_hits += 1
+                return entry['file_id']
+            return entry['png']
+
+    def put(self, key, png):
+        with self._lock:
+            self._entries[key] = {'png': png, 'file_id': None}
+            self._entries.move_to_end(key)
+            for stale in [k for k in self._entries if k[0] == key[0] and k[1] != key[1]]:
+                del self._entries[stale]
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def set_file_id(self, key, file_id):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['file_id'] = file_id
+
+    def forget_file_id(self, key):
+        """Drop a file_id Telegram no longer accepts; the PNG bytes are kept"""
+        self.set_file_id(key, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'file_id_hits': self.file_id_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0,
+            }
+
+chart_cache = ChartCache()
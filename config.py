@@ -107,6 +107,7 @@ MESSAGES = {
         'CONFIDENCE': "Боварӣ",
         'MINUTES': "дақиқа",
         'TIMEFRAME': "Сигнал дар {} мин",
+        'STALE_DATA': "Манбаи маълумот дастнорас аст, таҳлили {} дақиқа пеш нишон дода мешавад",
         'SIGNALS': {
             'BUY': '⬆️⬆️⬆️ *БОЛО* ⬆️⬆️⬆️\n💹 _Нишондиҳандаҳои техникӣ афзоишро нишон медиҳанд_',
             'SELL': '⬇️⬇️⬇️ *ПОЁН* ⬇️⬇️⬇️\n💢 _Нишондиҳандаҳои техникӣ камшавиро нишон медиҳанд_',
@@ -136,7 +137,7 @@ MESSAGES = {
 • ⚡️ Мгновенные сигналы с точностью до 95\%
 • 📱 Поддержка 5 языков
 • 📊 Чёткие и подробные графики
-• ⏱ Анализ на разных интервалах \(1, 5, 15, 30 минут\)
+• ⏱ Анализ на разных интервалах \(5, 15, 30 минут\)
         
         💎 *Валютные пары:*
 • 🏆 Основные пары: EUR/USD, GBP/USD, USD/JPY и другие
@@ -154,6 +155,7 @@ MESSAGES = {
         'CONFIDENCE': "Уверенность",
         'MINUTES': "минут",
         'TIMEFRAME': "Сигнал на {} минут",
+        'STALE_DATA': "Источник данных недоступен, показан анализ {} мин назад",
         'SIGNALS': {
             'BUY': '⬆️⬆️⬆️ *ВВЕРХ* ⬆️⬆️⬆️\n💹 _Технические индикаторы показывают рост_',
             'SELL': '⬇️⬇️⬇️ *ВНИЗ* ⬇️⬇️⬇️\n💢 _Технические индикаторы показывают падение_',
@@ -182,7 +184,7 @@ MESSAGES = {
 • ⚡️ 95\% aniqlikkacha bo'lgan tezkor signallar
 • 📱 5 til qo'llab\-quvvatlash
 • 📊 Aniq va batafsil grafiklar
-• ⏱ Turli intervallarda tahlil \(1, 5, 15, 30 daqiqa\)
+• ⏱ Turli intervallarda tahlil \(5, 15, 30 daqiqa\)
         
         💎 *Valyuta juftlari:*
 • 🏆 Asosiy juftlar: EUR/USD, GBP/USD, USD/JPY va boshqalar
@@ -200,6 +202,7 @@ MESSAGES = {
         'CONFIDENCE': "Ishonch",
         'MINUTES': "daqiqa",
         'TIMEFRAME': "Signal {} daqiqada",
+        'STALE_DATA': "Ma'lumot manbai mavjud emas, {} daqiqa oldingi tahlil ko'rsatilmoqda",
         'SIGNALS': {
             'BUY': '⬆️⬆️⬆️ *YUQORIGA* ⬆️⬆️⬆️\n💹 _Texnik ko\'rsatkichlar o\'sishni ko\'rsatmoqda_',
             'SELL': '⬇️⬇️⬇️ *PASTGA* ⬇️⬇️⬇️\n💢 _Texnik ko\'rsatkichlar tushishni ko\'rsatmoqda_',
@@ -228,7 +231,7 @@ MESSAGES = {
 • ⚡️ 95\% дәлдікке дейінгі жылдам сигналдар
 • 📱 5 тілді қолдау
 • 📊 Нақты және егжей\-тегжейлі графиктер
-• ⏱ Әртүрлі интервалдарда талдау \(1, 5, 15, 30 минут\)
+• ⏱ Әртүрлі интервалдарда талдау \(5, 15, 30 минут\)
         
         💎 *Валюта жұптары:*
 • 🏆 Негізгі жұптар: EUR/USD, GBP/USD, USD/JPY және басқалар
@@ -246,6 +249,7 @@ MESSAGES = {
         'CONFIDENCE': "Сенімділік",
         'MINUTES': "минут",
         'TIMEFRAME': "Сигнал {} минутта",
+        'STALE_DATA': "Деректер көзі қолжетімсіз, {} минут бұрынғы талдау көрсетілген",
         'SIGNALS': {
             'BUY': '⬆️⬆️⬆️ *ЖОҒАРЫ* ⬆️⬆️⬆️\n💹 _Техникалық индикаторлар өсуді көрсетеді_',
             'SELL': '⬇️⬇️⬇️ *ТӨМЕН* ⬇️⬇️⬇️\n💢 _Техникалық индикаторлар түсуді көрсетеді_',
@@ -274,7 +278,7 @@ MESSAGES = {
 • ⚡️ Instant signals with up to 95\% accuracy
 • 📱 5 language support
 • 📊 Clear and detailed charts
-• ⏱ Analysis at different intervals \(1, 5, 15, 30 minutes\)
+• ⏱ Analysis at different intervals \(5, 15, 30 minutes\)
         
         💎 *Currency Pairs:*
 • 🏆 Major pairs: EUR/USD, GBP/USD, USD/JPY and others
@@ -292,6 +296,7 @@ MESSAGES = {
         'CONFIDENCE': "Confidence",
         'MINUTES': "minutes",
         'TIMEFRAME': "Signal for {} min",
+        'STALE_DATA': "Data source unavailable, showing the analysis from {} min ago",
         'SIGNALS': {
             'BUY': '⬆️⬆️⬆️ *UPWARD* ⬆️⬆️⬆️\n💹 _Technical indicators show growth_',
             'SELL': '⬇️⬇️⬇️ *DOWNWARD* ⬇️⬇️⬇️\n💢 _Technical indicators show decline_',
@@ -1,6 +1,8 @@
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance, ImageOps
 import os
 import logging
+import hashlib
+import threading
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
@@ -12,7 +14,13 @@ import math
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_welcome_image():
+# Готовые приветственные изображения и их file_id в Telegram (пустое значение отключает диск)
+WELCOME_IMAGE_DIR = os.environ.get(
+    'WELCOME_IMAGE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'welcome')
+)
+
+def render_welcome_image():
+    """Рисует приветственное изображение и возвращает его в виде PNG (None при ошибке)"""
     try:
         # Создаем изображение с высоким качеством
         width, height = 1200, 700
@@ -449,13 +457,96 @@ def create_welcome_image():
         # Добавляем текст поддержки
         draw.text((support_x, support_y), support_text, fill=(255, 215, 0), font=contact_font)
         
-        # Сохраняем изображение
-        image.save('welcome_image.png')
-        logger.info("Изображение успешно создано: welcome_image.png")
-        return True
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        return buffer.getvalue()
     except Exception as e:
         logger.error(f"Ошибка при создании изображения: {e}")
+        return None
+
+def create_welcome_image():
+    png = render_welcome_image()
+    if png is None:
         return False
+    # Сохраняем изображение
+    with open('welcome_image.png', 'wb') as f:
+        f.write(png)
+    logger.info("Изображение успешно создано: welcome_image.png")
+    return True
+
+def welcome_input_hash():
+    """Хэш входных данных изображения: кода, который его рисует"""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+class WelcomeImage:
+    """Приветственное изображение, построенное один раз.
+
+    Изображение рисуется при запуске (или берётся с диска, если код
+    рисования не менялся) и хранится по хэшу содержимого. После первой
+    отправки запоминается file_id Telegram, и все следующие /start
+    отправляют его без рендера и загрузки.
+    """
+
+    def __init__(self, directory=WELCOME_IMAGE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.png = None
+        self.content_hash = None
+        self.file_id = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load(self):
+        """Строит изображение, если оно ещё не готово; возвращает PNG или None"""
+        with self._lock:
+            if self.png is not None:
+                return self.png
+            try:
+                input_hash = welcome_input_hash()
+                png = None
+                if self.directory and os.path.exists(self._path(f'{input_hash}.png')):
+                    with open(self._path(f'{input_hash}.png'), 'rb') as f:
+                        png = f.read()
+                if png is None:
+                    png = render_welcome_image()
+                    if png is None:
+                        return None
+                    if self.directory:
+                        os.makedirs(self.directory, exist_ok=True)
+                        with open(self._path(f'{input_hash}.png'), 'wb') as f:
+                            f.write(png)
+                self.content_hash = hashlib.sha256(png).hexdigest()
+                self.file_id = self._read_file_id()
+                self.png = png
+                logger.info(f"Приветственное изображение готово: {self.content_hash[:16]}")
+            except Exception as e:
+                logger.error(f"Ошибка при создании изображения: {e}")
+            return self.png
+
+    def _read_file_id(self):
+        path = self._path(f'{self.content_hash}.file_id') if self.directory else None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                return f.read().strip() or None
+        return None
+
+    def set_file_id(self, file_id):
+        with self._lock:
+            self.file_id = file_id
+            if self.directory and self.content_hash:
+                try:
+                    with open(self._path(f'{self.content_hash}.file_id'), 'w') as f:
+                        f.write(file_id or '')
+                except OSError as e:
+                    logger.warning(f"Не удалось сохранить file_id изображения: {e}")
+
+    def forget_file_id(self):
+        """Telegram больше не принимает file_id — следующая отправка загрузит PNG"""
+        self.set_file_id(None)
+
+welcome_image = WelcomeImage()
 
 if __name__ == "__main__":
     create_welcome_image()
\ No newline at end of file
@@ -1,39 +1,80 @@
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import numpy as np
 from datetime import datetime
+from io import BytesIO
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import os
 
-def create_analysis_image(analysis_result, market_data, lang_code='tg'):
+# Colours of the analysis chart per theme
+CHART_THEMES = {
+    'dark': {
+        'background': '#1a1b26',
+        'panel': '#24283b',
+        'grid': '#414868',
+        'text': 'white',
+        'price': 'white',
+        'ema_7': '#00ff00',
+        'ema_21': '#ff6b6b',
+        'volume': '#4a9eff',
+    },
+}
+DEFAULT_CHART_THEME = 'dark'
+
+def chart_arrays(analysis_result, market_data):
+    """Compact chart input: datetime64 timestamps plus float32 close, EMA and volume arrays.
+
+    Reuses the EMA series computed during analysis when they are available.
+    """
+    count = len(market_data)
+    close = market_data['Close'].to_numpy()
+    index = market_data.index
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    series = analysis_result.get('series', {}) if analysis_result else {}
+    if 'ema_7' in series and 'ema_21' in series:
+        ema_7 = series['ema_7'][-count:]
+        ema_21 = series['ema_21'][-count:]
+    else:
+        ema_7 = market_data['Close'].ewm(span=7, adjust=False).mean().to_numpy()
+        ema_21 = market_data['Close'].ewm(span=21, adjust=False).mean().to_numpy()
+    return {
+        'timestamps': index.to_numpy(),
+        'close': np.asarray(close, dtype=np.float32),
+        'ema_7': np.asarray(ema_7, dtype=np.float32),
+        'ema_21': np.asarray(ema_21, dtype=np.float32),
+        'volume': np.asarray(market_data['Volume'].to_numpy(), dtype=np.float32),
+    }
+
+def render_chart(timestamps, close, ema_7, ema_21, volume, lang_code='tg'):
+    """Draw the analysis chart from chart_arrays() output and return PNG bytes"""
+    # Create figure with subplots
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), height_ratios=[3, 1])
     try:
-        # Create figure with subplots
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), height_ratios=[3, 1])
         fig.patch.set_facecolor('#1a1b26')
-        
-        # Plot price data
-        ax1.plot(market_data.index, market_data['Close'], label='Price', color='white', linewidth=2)
-        
-        # Calculate and plot moving averages
-        ema_7 = market_data['Close'].ewm(span=7, adjust=False).mean()
-        ema_21 = market_data['Close'].ewm(span=21, adjust=False).mean()
-        ax1.plot(market_data.index, ema_7, label='EMA 7', color='#00ff00', alpha=0.7)
-        ax1.plot(market_data.index, ema_21, label='EMA 21', color='#ff6b6b', alpha=0.7)
-        
+
+        # Plot price data and moving averages
+        ax1.plot(timestamps, close, label='Price', color='white', linewidth=2)
+        ax1.plot(timestamps, ema_7, label='EMA 7', color='#00ff00', alpha=0.7)
+        ax1.plot(timestamps, ema_21, label='EMA 21', color='#ff6b6b', alpha=0.7)
+
         # Plot volume
-        ax2.bar(market_data.index, market_data['Volume'], color='#4a9eff', alpha=0.3)
-        
+        ax2.bar(timestamps, volume, color='#4a9eff', alpha=0.3)
+
         # Style the price plot
         ax1.set_facecolor('#24283b')
         ax1.grid(True, color='#414868', linestyle='--', alpha=0.3)
         ax1.set_title('Price Analysis', color='white', pad=20)
         ax1.legend(facecolor='#24283b', edgecolor='#414868', labelcolor='white')
         ax1.tick_params(colors='white')
-        
+
         # Style the volume plot
         ax2.set_facecolor('#24283b')
         ax2.grid(True, color='#414868', linestyle='--', alpha=0.3)
         ax2.set_title('Volume', color='white', pad=10)
         ax2.tick_params(colors='white')
-        
+
         # Format x-axis
         for ax in [ax1, ax2]:
             ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
@@ -41,13 +82,106 @@ def create_analysis_image(analysis_result, market_data, lang_code='tg'):
             ax.spines['right'].set_visible(False)
             ax.spines['bottom'].set_color('#414868')
             ax.spines['left'].set_color('#414868')
-        
-        # Adjust layout and save
-        plt.tight_layout()
-        plt.savefig('analysis_sample.png', dpi=100, bbox_inches='tight', facecolor='#1a1b26')
-        plt.close()
-        
-        return True
+
+        # Adjust layout and render into memory
+        fig.tight_layout()
+        buffer = BytesIO()
+        fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight', facecolor='#1a1b26')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+def create_analysis_image(analysis_result, market_data, lang_code='tg'):
+    """Render the analysis chart and return it as PNG bytes (None on failure).
+
+    Nothing is written to disk, so concurrent requests cannot get each
+    other's chart.
+    """
+    try:
+        return render_chart(**chart_arrays(analysis_result, market_data), lang_code=lang_code)
     except Exception as e:
         print(f"Error generating chart: {str(e)}")
-        return False
+        return None
+
+class ChartTemplate:
+    """Styled analysis chart that is built once and redrawn with new data.
+
+    The Figure, its Agg canvas, both axes, the styling, the legend and the
+    date formatters are created in the constructor. render() only swaps the
+    line data (close, EMA 7, EMA 21), the volume bar rectangles and the
+    axis limits, then rasterises. Not thread-safe: keep one per process
+    (see render_template_chart).
+    """
+
+    def __init__(self, theme=DEFAULT_CHART_THEME):
+        colors = CHART_THEMES[theme]
+        self.theme = theme
+        self.figure = Figure(figsize=(12, 8), dpi=100, facecolor=colors['background'])
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.price_ax, self.volume_ax = self.figure.subplots(2, 1, height_ratios=[3, 1])
+
+        self.close_line, = self.price_ax.plot([], [], label='Price', color=colors['price'], linewidth=2)
+        self.ema_7_line, = self.price_ax.plot([], [], label='EMA 7', color=colors['ema_7'], alpha=0.7)
+        self.ema_21_line, = self.price_ax.plot([], [], label='EMA 21', color=colors['ema_21'], alpha=0.7)
+        self.volume_bars = []
+        self._volume_color = colors['volume']
+
+        self.price_ax.set_title('Price Analysis', color=colors['text'], pad=20)
+        self.price_ax.legend(facecolor=colors['panel'], edgecolor=colors['grid'], labelcolor=colors['text'])
+        self.volume_ax.set_title('Volume', color=colors['text'], pad=10)
+        for ax in (self.price_ax, self.volume_ax):
+            ax.set_facecolor(colors['panel'])
+            ax.grid(True, color=colors['grid'], linestyle='--', alpha=0.3)
+            ax.tick_params(colors=colors['text'])
+            ax.xaxis_date()
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+            ax.spines['bottom'].set_color(colors['grid'])
+            ax.spines['left'].set_color(colors['grid'])
+
+        # Fixed layout: computed once here instead of bbox_inches='tight' on every save
+        self.figure.tight_layout()
+
+    def _set_volume(self, x, width, volume):
+        if len(self.volume_bars) != len(x):
+            for bar in self.volume_bars:
+                bar.remove()
+            self.volume_bars = list(self.volume_ax.bar(x, volume, width=width, color=self._volume_color, alpha=0.3))
+            return
+        for bar, left, height in zip(self.volume_bars, x - width / 2, volume):
+            bar.set_x(left)
+            bar.set_width(width)
+            bar.set_height(height)
+
+    def render(self, timestamps, close, ema_7, ema_21, volume):
+        """PNG bytes for chart_arrays() output"""
+        x = mdates.date2num(timestamps)
+        step = np.median(np.diff(x)) if len(x) > 1 else 1 / 288
+        width = step * 0.8
+
+        self.close_line.set_data(x, close)
+        self.ema_7_line.set_data(x, ema_7)
+        self.ema_21_line.set_data(x, ema_21)
+        self._set_volume(x, width, volume)
+
+        low = np.nanmin([np.nanmin(close), np.nanmin(ema_7), np.nanmin(ema_21)])
+        high = np.nanmax([np.nanmax(close), np.nanmax(ema_7), np.nanmax(ema_21)])
+        margin = (high - low) * 0.05 or abs(high) * 1e-4 or 1.0
+        for ax in (self.price_ax, self.volume_ax):
+            ax.set_xlim(x[0] - step / 2, x[-1] + step / 2)
+        self.price_ax.set_ylim(low - margin, high + margin)
+        self.volume_ax.set_ylim(0, (np.nanmax(volume) or 1.0) * 1.05)
+
+        buffer = BytesIO()
+        self.canvas.print_png(buffer)
+        return buffer.getvalue()
+
+_templates = {}
+
+def render_template_chart(timestamps, close, ema_7, ema_21, volume, lang_code='tg', theme=DEFAULT_CHART_THEME):
+    """render_chart() on this process's ChartTemplate for ``theme``"""
+    template = _templates.get(theme)
+    if template is None:
+        template = _templates[theme] = ChartTemplate(theme)
+    return template.render(timestamps, close, ema_7, ema_21, volume)
@@ -0,0 +1,122 @@
+import numpy as np
+
+# NumPy versions of MarketAnalyzer.calculate_* (pandas). Every function works
+# along the last axis, so a 2-D (symbol x bar) array is processed in one call,
+# and writes into caller supplied output arrays when given. Inputs must be
+# finite float arrays; MarketAnalyzer falls back to pandas otherwise.
+
+INDICATOR_NAMES = ('ema_7', 'ema_21', 'rsi', 'macd', 'macd_signal', 'bb_upper', 'bb_lower')
+
+def _ema_block_length(decay, n):
+    # Longest block for which decay ** -block stays far from float overflow
+    if decay <= 0:
+        return n
+    return int(max(1, min(n, 100 / -np.log10(decay))))
+
+def ema(x, span, out=None):
+    """EMA with pandas ewm(span=span, adjust=False) semantics.
+
+    The recursion y[t] = a*x[t] + (1-a)*y[t-1] is unrolled in blocks as
+    y[s+j] = d**(j+1) * (y[s-1] + a * cumsum(x[s+k] / d**(k+1))), which
+    replaces the per-element Python loop with a few array operations.
+    """
+    x = np.asarray(x, dtype=float)
+    if out is None:
+        out = np.empty_like(x)
+    n = x.shape[-1]
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    if n == 0:
+        return out
+
+    out[..., 0] = x[..., 0]
+    block = _ema_block_length(decay, n)
+    powers = decay ** np.arange(1, block + 1)
+    prev = out[..., 0]
+    for start in range(1, n, block):
+        stop = min(start + block, n)
+        p = powers[:stop - start]
+        seg = out[..., start:stop]
+        np.divide(x[..., start:stop], p, out=seg)
+        np.cumsum(seg, axis=-1, out=seg)
+        seg *= alpha
+        seg += prev[..., None]
+        seg *= p
+        prev = seg[..., -1]
+    return out
+
+def rsi(x, period=14, out=None):
+    """RSI from simple rolling means of gains and losses (calculate_rsi)"""
+    x = np.asarray(x, dtype=float)
+    if out is None:
+        out = np.empty_like(x)
+    n = x.shape[-1]
+    out[...] = np.nan
+    if n < period:
+        return out
+
+    # The first delta is 0, matching diff() followed by where(..., 0)
+    delta = np.diff(x, axis=-1, prepend=x[..., :1])
+    gain = np.maximum(delta, 0.0)
+    loss = np.maximum(-delta, 0.0)
+    windows = np.lib.stride_tricks.sliding_window_view
+    avg_gain = windows(gain, period, axis=-1).mean(axis=-1)
+    avg_loss = windows(loss, period, axis=-1).mean(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(avg_gain, avg_loss, out=avg_gain)
+        avg_gain += 1.0
+        np.divide(100.0, avg_gain, out=avg_gain)
+        np.subtract(100.0, avg_gain, out=out[..., period - 1:])
+    return out
+
+def macd(x, fast=12, slow=26, signal=9, out=None, signal_out=None):
+    """MACD line and its signal line (calculate_macd)"""
+    x = np.asarray(x, dtype=float)
+    if out is None:
+        out = np.empty_like(x)
+    if signal_out is None:
+        signal_out = np.empty_like(x)
+    slow_ema = ema(x, slow, out=signal_out)  # signal_out doubles as scratch
+    ema(x, fast, out=out)
+    out -= slow_ema
+    ema(out, signal, out=signal_out)
+    return out, signal_out
+
+def bollinger_bands(x, period=20, width=2.0, upper_out=None, lower_out=None):
+    """Bollinger Bands from the rolling mean and sample std (calculate_bollinger_bands)"""
+    x = np.asarray(x, dtype=float)
+    if upper_out is None:
+        upper_out = np.empty_like(x)
+    if lower_out is None:
+        lower_out = np.empty_like(x)
+    n = x.shape[-1]
+    upper_out[...] = np.nan
+    lower_out[...] = np.nan
+    if n < period:
+        return upper_out, lower_out
+
+    window = np.lib.stride_tricks.sliding_window_view(x, period, axis=-1)
+    mean = window.mean(axis=-1)
+    spread = window.std(axis=-1, ddof=1)
+    spread *= width
+    np.add(mean, spread, out=upper_out[..., period - 1:])
+    np.subtract(mean, spread, out=lower_out[..., period - 1:])
+    return upper_out, lower_out
+
+def compute_all(close, out=None):
+    """Every indicator used by analyze_timeframe in one pass over close.
+
+    Results are written into one preallocated (len(INDICATOR_NAMES), ..., n)
+    block (``out``, allocated when omitted) and returned as a dict of views.
+    """
+    close = np.ascontiguousarray(close, dtype=float)
+    if out is None:
+        out = np.empty((len(INDICATOR_NAMES),) + close.shape)
+    rows = dict(zip(INDICATOR_NAMES, out))
+
+    ema(close, 7, out=rows['ema_7'])
+    ema(close, 21, out=rows['ema_21'])
+    rsi(close, out=rows['rsi'])
+    macd(close, out=rows['macd'], signal_out=rows['macd_signal'])
+    bollinger_bands(close, upper_out=rows['bb_upper'], lower_out=rows['bb_lower'])
+    return rows
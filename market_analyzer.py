@@ -1,18 +1,439 @@
 import logging
-import yfinance as yf
+import asyncio
+import threading
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import time
-from config import MESSAGES
+from config import MESSAGES, CURRENCY_PAIRS
+import indicator_kernel
+from bar_buffer import PYRAMID_INTERVALS, bar_buffers, bars_to_frame, frame_to_arrays
+from bar_store import bar_store
+from market_data import (
+    DEFAULT_INTERVAL, SingleFlight, bar_cache, circuit_breakers, fetch_flight, interval_seconds, next_bar_close,
+    signal_cache
+)
+from market_providers import get_provider
+
+TIMEFRAMES = [5, 15, 30]  # Native bars are 5m, so a 1m timeframe would repeat the 5m one
+INDICATOR_ENGINE = 'numpy'  # 'numpy' (indicator_kernel) or 'pandas' (calculate_* reference versions)
+INDICATOR_WARMUP = 35  # extra bars before the longest timeframe so MACD and its signal line settle
+CHART_BARS = 120  # native bars handed to the chart with every analysis
+SCAN_TIMEFRAME = 5  # minutes, the timeframe the market scanner ranks pairs on
+SCAN_BARS = 100  # bars per pair in the scanner's (pair x bar) batch
+
+# Signal scoring thresholds used by analyze_timeframe and the backtester
+SIGNAL_PARAMS = {
+    'ema_spread': 0.05,  # % spread between EMA 7 and EMA 21 for a trend vote
+    'rsi_oversold': 35,  # strong buy votes below
+    'rsi_overbought': 65,  # strong sell votes above
+    'rsi_buy': 45,
+    'rsi_sell': 55,
+    'volume_high': 1.5,  # volume ratio thresholds for volume strength 3/2/1
+    'volume_medium': 1.2,
+    'volume_low': 1.0,
+    'volume_weight': 0.2,  # strength multiplier per volume strength point
+    'signal_threshold': 1.2,  # minimum |strength| for BUY/SELL
+    'confidence_base': 50,
+    'confidence_step': 5,  # confidence points per strength point
+    'confidence_max': 95,
+}
+
+# Market data fetching
+MAX_RETRIES = 3
+RETRY_DELAY = 2  # seconds, multiplied by the attempt number
+FETCH_TIMEOUT = 10  # seconds per provider request in the async path
+ANALYSIS_TIMEOUT = 40  # seconds for a whole async analysis, retries included
+MARKET_DATA_WORKERS = 8  # upper bound on concurrent blocking fetches
+BATCH_SIZE = 40  # symbols per multi-ticker download
+HISTORY_DAYS = 1  # provider lookback for symbols without recent bars in memory or on disk
+
+# Shared bounded pool for blocking provider/pandas work started from async handlers
+_executor = ThreadPoolExecutor(max_workers=MARKET_DATA_WORKERS, thread_name_prefix='market-data')
+# Concurrent signal cache misses for the same (symbol, bar) share one analysis
+analysis_flight = SingleFlight('analysis')
 
-TIMEFRAMES = [1, 5, 15, 30]  # Reduced timeframes for faster response
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)  # Set to DEBUG for more detailed logs
 
+def normalize_bars(df, symbol):
+    """Bring a provider OHLCV frame to the cached layout (Datetime index, Volume present).
+
+    Returns None when required price columns are missing.
+    """
+    # Add Volume column if missing (common for forex pairs)
+    if 'Volume' not in df.columns:
+        logger.info(f"Volume data not available for {symbol}, using placeholder values")
+        df['Volume'] = 1.0  # Use placeholder value for volume
+
+    required_columns = ['Open', 'High', 'Low', 'Close']
+    if not all(col in df.columns for col in required_columns):
+        logger.error(f"Missing required columns. Available: {df.columns}")
+        return None
+
+    # Ensure proper datetime handling
+    df = df.reset_index()
+    if 'Date' in df.columns:
+        df = df.rename(columns={'Date': 'Datetime'})
+    elif 'Datetime' not in df.columns and df.index.name == 'Datetime':
+        df = df.reset_index()
+
+    df.set_index('Datetime', inplace=True)
+    return df
+
+def restore_bars(symbol, interval=DEFAULT_INTERVAL):
+    """Load the symbol's stored history into its bar pyramid before the first fetch"""
+    pyramid = bar_buffers.pyramid(symbol)
+    if len(pyramid.base):
+        return 0
+    timestamps, values = bar_store.load_recent(symbol, interval)
+    if not timestamps.size:
+        return 0
+    written = pyramid.extend(timestamps, values)
+    logger.info(f"Restored {written} stored bars for {symbol} ({interval})")
+    return written
+
+def fetch_start(symbol, interval=DEFAULT_INTERVAL, now=None):
+    """Start of the next provider request: the newest bar held, or HISTORY_DAYS back.
+
+    Starting at the newest bar (not after it) also refreshes that bar in
+    case it was still forming when it was fetched. Returns an aware UTC
+    datetime: yfinance reads naive datetimes in the exchange timezone, not
+    in the host's.
+    """
+    now = datetime.now(timezone.utc) if now is None else now
+    lookback_start = now - timedelta(days=HISTORY_DAYS)
+    last = bar_buffers.get(symbol, interval).last_timestamp
+    if last is None:
+        return lookback_start
+    return max(lookback_start, datetime.fromtimestamp(last / 1e9, tz=timezone.utc))
+
+def expects_bars(symbol, start, interval=DEFAULT_INTERVAL):
+    """True when a request from ``start`` must return at least the newest bar held.
+
+    An empty answer is then a provider failure. It is only expected when
+    fetch_start was clamped to the HISTORY_DAYS lookback (e.g. a long weekend).
+    """
+    last = bar_buffers.get(symbol, interval).last_timestamp
+    return last is not None and start.timestamp() <= last / 1e9
+
+def store_bars(symbol, interval, df):
+    """Merge fetched bars into memory and the on-disk store and mark them fresh.
+
+    Returns the timestamp of the newest bar held after the merge.
+    """
+    bar_buffers.store_frame(symbol, interval, df)
+    bar_store.append(symbol, interval, *frame_to_arrays(df))
+    return mark_bars_fresh(symbol, interval)
+
+def mark_bars_fresh(symbol, interval=DEFAULT_INTERVAL):
+    """Record the newest held bar in the bar cache until the current bar closes"""
+    bar_time = bar_buffers.get(symbol, interval).last_timestamp
+    bar_cache.put(symbol, interval, bar_time)
+    return bar_time
+
+def fetch_batch(symbols, interval=DEFAULT_INTERVAL, only_missing=True):
+    """Download bars for many symbols with one provider batch request.
+
+    Every usable frame is merged into the bar buffers and marked fresh in the
+    bar cache. Symbols already fresh in the cache are skipped
+    unless only_missing is False. Stored history is restored first and only
+    the gap since the newest bar is requested. Returns {symbol: df} with the
+    bars held for the symbols fetched; the frames are not kept.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if only_missing:
+        symbols = [symbol for symbol in symbols if not bar_cache.is_fresh(symbol, interval)]
+
+    provider = get_provider()
+    breakers = {symbol: circuit_breakers.get(provider.name, symbol) for symbol in symbols}
+    # Symbols behind an open breaker are skipped; the batch is the probe for half-open ones
+    symbols = [symbol for symbol in symbols if breakers[symbol].allow()]
+
+    fetched = {}
+    for i in range(0, len(symbols), BATCH_SIZE):
+        chunk = symbols[i:i + BATCH_SIZE]
+        for symbol in chunk:
+            restore_bars(symbol, interval)
+        end_time = datetime.now(timezone.utc)
+        start_time = min(fetch_start(symbol, interval, end_time) for symbol in chunk)
+
+        logger.info(f"Batch fetching {len(chunk)} symbols ({interval}) from {provider.name}")
+        try:
+            frames = provider.download(chunk, start_time, end_time, interval)
+        except Exception as e:
+            logger.error(f"Batch fetch failed for {len(chunk)} symbols: {str(e)}")
+            for symbol in chunk:
+                breakers[symbol].record_failure()
+            continue
+
+        for symbol in chunk:
+            df = frames.get(symbol)
+            if df is None or df.empty:
+                if len(bar_buffers.get(symbol, interval)) and not expects_bars(symbol, start_time, interval):
+                    # Start clamped to the lookback: nothing new since the newest bar held (market closed)
+                    breakers[symbol].record_success()
+                    mark_bars_fresh(symbol, interval)
+                    fetched[symbol] = bar_buffers.get(symbol, interval).to_frame()
+                else:
+                    logger.warning(f"No batch data for {symbol}")
+                    breakers[symbol].record_failure()
+                continue
+            breakers[symbol].record_success()
+
+            df = normalize_bars(df.copy(), symbol)
+            if df is None:
+                continue
+
+            store_bars(symbol, interval, df)
+            fetched[symbol] = bar_buffers.get(symbol, interval).to_frame()
+
+    logger.info(f"Batch fetch stored {len(fetched)}/{len(symbols)} symbols in the bar cache")
+    return fetched
+
+async def fetch_batch_async(symbols, interval=DEFAULT_INTERVAL, only_missing=True):
+    """fetch_batch on the shared market data executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, fetch_batch, symbols, interval, only_missing)
+
+def warm_up_cache(symbols=None):
+    """Fill the bar cache for the whole CURRENCY_PAIRS universe in one batch"""
+    if symbols is None:
+        symbols = list(CURRENCY_PAIRS.values())
+    return fetch_batch(symbols)
+
+class IndicatorState:
+    """Running indicator values for one symbol, updated one closed bar at a time.
+
+    EMA-7/21, MACD (12/26) and its signal line (9) follow the same
+    adjust=False recursion as the batch indicators. RSI uses Wilder's
+    smoothing of average gain/loss, and the Bollinger Bands keep a rolling
+    window with running sums, so every update is O(1).
+    """
+
+    def __init__(self, symbol, rsi_period=14, bb_period=20, bb_width=2.0):
+        self.symbol = symbol
+        self.rsi_period = rsi_period
+        self.bb_period = bb_period
+        self.bb_width = bb_width
+        self.bars = 0
+        self.timestamp = None
+        self.close = None
+        self.ema = {}
+        self.macd = None
+        self.prev_macd = None
+        self.macd_signal = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._window = deque(maxlen=bb_period)
+        self._offset = None  # reference price keeps the running sums well conditioned
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._lock = threading.Lock()
+
+    def _ema_step(self, name, span, value):
+        previous = self.ema.get(name)
+        alpha = 2.0 / (span + 1.0)
+        self.ema[name] = value if previous is None else alpha * value + (1 - alpha) * previous
+        return self.ema[name]
+
+    def update(self, close, timestamp=None):
+        """Add one closed bar; bars not newer than the last one are ignored"""
+        with self._lock:
+            if timestamp is not None and self.timestamp is not None and timestamp <= self.timestamp:
+                return self._snapshot()
+            close = float(close)
+
+            if self.close is not None:
+                delta = close - self.close
+                gain, loss = max(delta, 0.0), max(-delta, 0.0)
+                if self.bars <= self.rsi_period:
+                    # Seed with the simple average of the first rsi_period deltas
+                    self.avg_gain += gain / self.rsi_period
+                    self.avg_loss += loss / self.rsi_period
+                else:
+                    self.avg_gain = (self.avg_gain * (self.rsi_period - 1) + gain) / self.rsi_period
+                    self.avg_loss = (self.avg_loss * (self.rsi_period - 1) + loss) / self.rsi_period
+
+            self._ema_step('ema_7', 7, close)
+            self._ema_step('ema_21', 21, close)
+            macd = self._ema_step('ema_12', 12, close) - self._ema_step('ema_26', 26, close)
+            self.prev_macd, self.macd = self.macd, macd
+            self.macd_signal = self._ema_step('macd_signal', 9, macd)
+
+            if self._offset is None:
+                self._offset = close
+            shifted = close - self._offset
+            if len(self._window) == self.bb_period:
+                dropped = self._window[0]
+                self._sum -= dropped
+                self._sum_sq -= dropped * dropped
+            self._window.append(shifted)
+            self._sum += shifted
+            self._sum_sq += shifted * shifted
+
+            self.close = close
+            self.timestamp = timestamp
+            self.bars += 1
+            return self._snapshot()
+
+    def update_many(self, closes, timestamps=None):
+        if timestamps is None:
+            timestamps = [None] * len(closes)
+        for close, timestamp in zip(closes, timestamps):
+            self.update(close, timestamp)
+        return self.snapshot()
+
+    def update_from_frame(self, df, interval=DEFAULT_INTERVAL, now=None):
+        """Feed the closed bars of a cached OHLCV frame that are newer than the state"""
+        now = pd.Timestamp.now(tz='UTC') if now is None else now
+        bar_length = pd.Timedelta(seconds=interval_seconds(interval))
+        index = df.index if df.index.tz is not None else df.index.tz_localize('UTC')
+        closed = (index + bar_length) <= now
+        if self.timestamp is not None:
+            closed &= index > self.timestamp
+        return self.update_many(df['Close'].to_numpy()[closed], list(index[closed]))
+
+    @property
+    def ready(self):
+        """True once RSI and the Bollinger window have a full period of data"""
+        return self.bars > self.rsi_period and len(self._window) == self.bb_period
+
+    def _snapshot(self):
+        rsi = None
+        if self.bars > self.rsi_period:
+            if self.avg_loss == 0:
+                rsi = 100.0 if self.avg_gain > 0 else None
+            else:
+                rsi = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+        bb_middle = bb_upper = bb_lower = None
+        count = len(self._window)
+        if count == self.bb_period:
+            mean = self._sum / count
+            variance = max((self._sum_sq - count * mean * mean) / (count - 1), 0.0)
+            std = variance ** 0.5
+            bb_middle = mean + self._offset
+            bb_upper = bb_middle + self.bb_width * std
+            bb_lower = bb_middle - self.bb_width * std
+
+        return {
+            'symbol': self.symbol,
+            'timestamp': self.timestamp,
+            'bars': self.bars,
+            'close': self.close,
+            'ema_7': self.ema.get('ema_7'),
+            'ema_21': self.ema.get('ema_21'),
+            'macd': self.macd,
+            'macd_signal': self.macd_signal,
+            'macd_trend': None if self.prev_macd is None else self.macd - self.prev_macd,
+            'rsi': rsi,
+            'bb_middle': bb_middle,
+            'bb_upper': bb_upper,
+            'bb_lower': bb_lower
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+_indicator_states = {}
+_indicator_states_lock = threading.Lock()
+
+def resolution_for(minutes, intervals=PYRAMID_INTERVALS):
+    """Coarsest pyramid interval that still fits into a timeframe of ``minutes``"""
+    chosen = intervals[0]
+    for interval in intervals:
+        if interval_seconds(interval) <= minutes * 60:
+            chosen = interval
+    return chosen
+
+def get_indicator_state(symbol):
+    """Process-wide IndicatorState for symbol, created on first use"""
+    with _indicator_states_lock:
+        state = _indicator_states.get(symbol)
+        if state is None:
+            state = _indicator_states[symbol] = IndicatorState(symbol)
+        return state
+
+def update_indicator_states(frames, interval=DEFAULT_INTERVAL):
+    """Advance the per-symbol states with freshly fetched frames ({symbol: df})"""
+    updated = 0
+    for symbol, df in frames.items():
+        try:
+            get_indicator_state(symbol).update_from_frame(df, interval)
+            updated += 1
+        except Exception as e:
+            logger.error(f"Indicator state update failed for {symbol}: {str(e)}")
+    return updated
+
+def rolling_mean(x, window):
+    """Mean of the last ``window`` values at every position along the last axis (fewer at the start)"""
+    csum = np.concatenate([np.zeros(x.shape[:-1] + (1,)), np.cumsum(x, axis=-1)], axis=-1)
+    end = np.arange(1, x.shape[-1] + 1)
+    start = np.maximum(end - window, 0)
+    return (csum[..., end] - csum[..., start]) / (end - start)
+
+def signal_arrays(close, volume, bars, params=SIGNAL_PARAMS, indicators=None):
+    """analyze_timeframe's scoring evaluated at every bar, along the last axis.
+
+    ``bars`` is the timeframe length in bars, as passed to analyze_timeframe;
+    close and volume may be 1-D or (symbol x bar). Returns a dict of arrays:
+    strength, signal (1 BUY, -1 SELL, 0 NEUTRAL) and confidence, where
+    position t uses only bars up to t.
+    """
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    if indicators is None:
+        indicators = indicator_kernel.compute_all(close)
+
+    # Volume strength against the mean over the timeframe window
+    avg_volume = rolling_mean(volume, bars + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ratio = np.where(avg_volume > 0, volume / avg_volume, 1.0)
+    volume_strength = np.select(
+        [volume_ratio > params['volume_high'], volume_ratio > params['volume_medium'],
+         volume_ratio > params['volume_low']],
+        [3, 2, 1], 0
+    )
+
+    votes = np.zeros(close.shape)
+
+    ema_diff_percent = (indicators['ema_7'] - indicators['ema_21']) / indicators['ema_21'] * 100
+    votes += np.select(
+        [ema_diff_percent > params['ema_spread'], ema_diff_percent < -params['ema_spread']], [1, -1], 0
+    )
+
+    macd = indicators['macd']
+    macd_diff = macd - indicators['macd_signal']
+    positions = np.arange(close.shape[-1])
+    macd_trend = macd - macd[..., positions - np.minimum(bars, positions)]
+    votes += np.where(macd_diff > 0, 1 + (macd_trend > 0), -1 - (macd_trend < 0))
+
+    rsi = indicators['rsi']
+    votes += np.select(
+        [rsi < params['rsi_oversold'], rsi > params['rsi_overbought'],
+         rsi < params['rsi_buy'], rsi > params['rsi_sell']],
+        [3, -3, 1, -1], 0
+    )
+
+    votes += np.select([close < indicators['bb_lower'], close > indicators['bb_upper']], [2, -2], 0)
+
+    strength = votes * (1 + volume_strength * params['volume_weight'])
+    confidence = np.clip(
+        params['confidence_base'] + np.abs(strength) * params['confidence_step'],
+        params['confidence_base'], params['confidence_max']
+    )
+    signal = np.where(np.abs(strength) >= params['signal_threshold'], np.sign(strength), 0).astype(np.int8)
+    return {'strength': strength, 'signal': signal, 'confidence': confidence}
+
 class MarketAnalyzer:
     def __init__(self, symbol):
         self.symbol = symbol
+        self.indicator_engine = INDICATOR_ENGINE
+        self.signal_params = dict(SIGNAL_PARAMS)
         self.error_messages = MESSAGES['tg']['ERRORS']
         logger.info(f"Initialized MarketAnalyzer for {symbol}")
 
@@ -44,76 +465,152 @@ class MarketAnalyzer:
         lower_band = sma - (std * 2)
         return upper_band, lower_band
 
-    def get_market_data(self, minutes=30):
+    def _fetch_bars(self, start_time=None):
+        """Download native bars from start_time (HISTORY_DAYS back by default) and normalise the frame.
+
+        Returns (df, error_message, retry); df is indexed by 'Datetime'.
+        """
+        end_time = datetime.now(timezone.utc)
+        if start_time is None:
+            start_time = end_time - timedelta(days=HISTORY_DAYS)
+
+        provider = get_provider()
+        logger.debug(f"Fetching data for {self.symbol} from {provider.name}")
+        logger.debug(f"Time range: {start_time} to {end_time}")
+
+        df = provider.history(self.symbol, start_time, end_time, DEFAULT_INTERVAL)
+
+        logger.debug(f"Received data shape: {df.shape}")
+        logger.debug(f"Available columns: {df.columns}")
+
+        if df.empty:
+            logger.warning(f"Empty DataFrame received for {self.symbol}")
+            return None, self.error_messages['NO_DATA'], True
+
+        df = normalize_bars(df, self.symbol)
+        if df is None:
+            return None, self.error_messages['NO_DATA'], False
+        return df, None, False
+
+    def _fetch_and_cache(self):
+        """Fetch the bars missing since the newest one held and merge them in.
+
+        Returns (bar_time, error_message, retry) with the timestamp of the
+        newest bar held after the merge. Goes through the (provider, symbol) circuit
+        breaker: while it is open the provider is not called and retry is False.
+        """
+        breaker = circuit_breakers.get(get_provider().name, self.symbol)
+        if not breaker.allow():
+            logger.debug(f"Circuit breaker open for {self.symbol}, not fetching")
+            return None, self.error_messages['TIMEOUT_ERROR'], False
+
+        restore_bars(self.symbol)
+        start_time = fetch_start(self.symbol)
         try:
-            end_time = datetime.now()
-            start_time = end_time - timedelta(days=1)  # 1 day lookback for better data availability
+            df, error_message, retry = self._fetch_bars(start_time)
+        except Exception as e:
+            logger.error(f"Fetch failed for {self.symbol}: {str(e)}")
+            breaker.record_failure()
+            return None, self.error_messages['TIMEOUT_ERROR'], breaker.is_closed
+        if error_message:
+            if retry and len(bar_buffers.get(self.symbol, DEFAULT_INTERVAL)) and not expects_bars(self.symbol, start_time):
+                # Start clamped to the lookback: the market has been closed since the newest bar
+                logger.debug(f"No new bars for {self.symbol}, serving the bars held")
+                breaker.record_success()
+                return mark_bars_fresh(self.symbol), None, False
+            if retry:
+                breaker.record_failure()
+                return df, error_message, breaker.is_closed
+            breaker.record_success()
+            return df, error_message, retry
+        breaker.record_success()
+        return store_bars(self.symbol, DEFAULT_INTERVAL, df), None, False
+
+    def get_bars(self, count=None, interval=DEFAULT_INTERVAL):
+        """Latest bars at ``interval`` as zero-copy NumPy views from the symbol's bar pyramid.
+
+        Fetches first when the cached native bars are stale. Returns
+        (bars, error_message) where bars is a dict of read-only arrays
+        (see BarBuffer.window).
+        """
+        buffer = bar_buffers.get(self.symbol, interval)
+        if not len(buffer) or not bar_cache.is_fresh(self.symbol, DEFAULT_INTERVAL):
+            _, error_message, _ = fetch_flight.do((self.symbol, DEFAULT_INTERVAL), self._fetch_and_cache)
+            if error_message:
+                return None, error_message
+        return buffer.window(count), None
+
+    def _prepare_market_data(self, minutes):
+        """The native bars covering the last ``minutes`` minutes, copied out of the bar buffer"""
+        buffer = bar_buffers.get(self.symbol, DEFAULT_INTERVAL)
+        needed = -(-minutes * 60 // interval_seconds(DEFAULT_INTERVAL))
+        data_points = len(buffer)
+        logger.info(f"Successfully fetched {data_points} data points for {self.symbol}")
 
-            max_retries = 3
-            retry_delay = 2
+        if data_points < needed:
+            logger.warning(f"Insufficient data points: got {data_points}, needed {needed}")
+            # Drop the short frame so a retry asks the provider again
+            bar_cache.invalidate(self.symbol, DEFAULT_INTERVAL)
+            return None, self.error_messages['NO_DATA'], True
+
+        return buffer.to_frame(needed), None, False
+
+    def _load_market_data(self, minutes):
+        """Single blocking fetch attempt, served from the shared bar cache when possible.
+
+        Concurrent misses for the same symbol share one provider request.
+        Returns (df, error_message, retry) so callers can share one retry policy.
+        """
+        if bar_cache.get(self.symbol, DEFAULT_INTERVAL) is None:
+            _, error_message, retry = fetch_flight.do(
+                (self.symbol, DEFAULT_INTERVAL), self._fetch_and_cache
+            )
+            if error_message:
+                return None, error_message, retry
+        else:
+            logger.debug(f"Bar cache hit for {self.symbol}")
 
-            for attempt in range(max_retries):
+        return self._prepare_market_data(minutes)
+
+    async def _load_market_data_async(self, minutes, timeout):
+        """Async counterpart of _load_market_data.
+
+        Coalesced callers await the leader's future without holding a worker
+        thread; a caller timing out does not cancel the shared fetch.
+        """
+        loop = asyncio.get_running_loop()
+        if bar_cache.get(self.symbol, DEFAULT_INTERVAL) is None:
+            future, leader = fetch_flight.submit(
+                (self.symbol, DEFAULT_INTERVAL), _executor, self._fetch_and_cache
+            )
+            if not leader:
+                logger.debug(f"Joined in-flight fetch for {self.symbol}")
+            _, error_message, retry = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), timeout
+            )
+            if error_message:
+                return None, error_message, retry
+        else:
+            logger.debug(f"Bar cache hit for {self.symbol}")
+
+        return await loop.run_in_executor(_executor, self._prepare_market_data, minutes)
+
+    def get_market_data(self, minutes=30):
+        try:
+            for attempt in range(MAX_RETRIES):
                 try:
                     logger.debug(f"Attempt {attempt + 1}: Fetching data for {self.symbol}")
-                    logger.debug(f"Time range: {start_time} to {end_time}")
-
-                    ticker = yf.Ticker(self.symbol)
-                    df = ticker.history(
-                        start=start_time,
-                        end=end_time,
-                        interval='5m',  # Use 5m interval for better availability
-                        prepost=True
-                    )
-
-                    logger.debug(f"Received data shape: {df.shape}")
-                    logger.debug(f"Available columns: {df.columns}")
-
-                    if df.empty:
-                        logger.warning(f"Empty DataFrame received for {self.symbol}")
-                        if attempt < max_retries - 1:
-                            time.sleep(retry_delay * (attempt + 1))
-                            continue
-                        return None, self.error_messages['NO_DATA']
-
-                    # Add Volume column if missing (common for forex pairs)
-                    if 'Volume' not in df.columns:
-                        logger.info(f"Volume data not available for {self.symbol}, using placeholder values")
-                        df['Volume'] = 1.0  # Use placeholder value for volume
-
-                    required_columns = ['Open', 'High', 'Low', 'Close']
-                    if not all(col in df.columns for col in required_columns):
-                        logger.error(f"Missing required columns. Available: {df.columns}")
-                        return None, self.error_messages['NO_DATA']
-
-                    # Ensure proper datetime handling
-                    df = df.reset_index()
-                    if 'Date' in df.columns:
-                        df = df.rename(columns={'Date': 'Datetime'})
-                    elif 'Datetime' not in df.columns and df.index.name == 'Datetime':
-                        df = df.reset_index()
-
-                    df.set_index('Datetime', inplace=True)
-
-                    # Convert to 1-minute data through interpolation
-                    df = df.resample('1min').interpolate(method='time')
-                    logger.debug(f"After resampling - shape: {df.shape}, columns: {df.columns}")
-
-                    data_points = len(df)
-                    logger.info(f"Successfully fetched {data_points} data points for {self.symbol}")
-
-                    if data_points < minutes:
-                        logger.warning(f"Insufficient data points: got {data_points}, needed {minutes}")
-                        if attempt < max_retries - 1:
-                            time.sleep(retry_delay * (attempt + 1))
-                            continue
-                        return None, self.error_messages['NO_DATA']
-
-                    return df.tail(minutes), None
+                    df, error_message, retry = self._load_market_data(minutes)
+
+                    if retry and attempt < MAX_RETRIES - 1:
+                        time.sleep(RETRY_DELAY * (attempt + 1))
+                        continue
+                    return df, error_message
 
                 except Exception as e:
                     logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_delay * (attempt + 1))
+                    if attempt < MAX_RETRIES - 1:
+                        time.sleep(RETRY_DELAY * (attempt + 1))
                         continue
                     return None, self.error_messages['TIMEOUT_ERROR']
 
@@ -121,35 +618,128 @@ class MarketAnalyzer:
             logger.error(f"Critical error in get_market_data: {str(e)}")
             return None, self.error_messages['GENERAL_ERROR']
 
-    def analyze_timeframe(self, df, minutes):
-        if df is None or len(df) < minutes:
+    async def get_market_data_async(self, minutes=30, timeout=FETCH_TIMEOUT):
+        """Non-blocking variant of get_market_data for the bot's event loop.
+
+        Each attempt runs in the shared market data executor and is bounded by
+        ``timeout`` seconds; backoff between attempts uses asyncio.sleep.
+        Cancelling the calling task stops waiting immediately.
+        """
+        try:
+            for attempt in range(MAX_RETRIES):
+                try:
+                    logger.debug(f"Attempt {attempt + 1}: Fetching data for {self.symbol}")
+                    df, error_message, retry = await self._load_market_data_async(minutes, timeout)
+
+                    if retry and attempt < MAX_RETRIES - 1:
+                        await asyncio.sleep(RETRY_DELAY * (attempt + 1))
+                        continue
+                    return df, error_message
+
+                except asyncio.TimeoutError:
+                    logger.warning(f"Attempt {attempt + 1} timed out after {timeout}s for {self.symbol}")
+                    if attempt < MAX_RETRIES - 1:
+                        await asyncio.sleep(RETRY_DELAY * (attempt + 1))
+                        continue
+                    return None, self.error_messages['TIMEOUT_ERROR']
+
+                except Exception as e:
+                    logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
+                    if attempt < MAX_RETRIES - 1:
+                        await asyncio.sleep(RETRY_DELAY * (attempt + 1))
+                        continue
+                    return None, self.error_messages['TIMEOUT_ERROR']
+
+        except asyncio.CancelledError:
+            logger.info(f"Market data request for {self.symbol} was cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Critical error in get_market_data_async: {str(e)}")
+            return None, self.error_messages['GENERAL_ERROR']
+
+    def compute_indicators(self, df):
+        """Compute every indicator series once over the whole frame.
+
+        Returns a dict of numpy arrays aligned with df; analyze_timeframe
+        reads the values for any timeframe from it. Uses the NumPy kernel
+        unless indicator_engine is 'pandas' or the closes contain NaN.
+        """
+        return self._compute_indicators(
+            df['Close'].to_numpy(dtype=float), df['Volume'].to_numpy(dtype=float)
+        )
+
+    def compute_bar_indicators(self, bars):
+        """compute_indicators for a BarBuffer.window() dict of arrays"""
+        # Copies: the ring buffer behind the views keeps receiving bars
+        return self._compute_indicators(bars['close'].copy(), bars['volume'].copy())
+
+    def _compute_indicators(self, close, volume):
+        if self.indicator_engine == 'numpy' and np.isfinite(close).all():
+            result = indicator_kernel.compute_all(close)
+        else:
+            result = self._compute_indicators_pandas(pd.Series(close))
+        result['close'] = close
+        result['volume'] = volume
+        return result
+
+    def _compute_indicators_pandas(self, close_prices):
+        macd, macd_signal = self.calculate_macd(close_prices)
+        upper_band, lower_band = self.calculate_bollinger_bands(close_prices)
+        return {
+            'ema_7': self.calculate_ema(close_prices, 7).to_numpy(),
+            'ema_21': self.calculate_ema(close_prices, 21).to_numpy(),
+            'rsi': self.calculate_rsi(close_prices).to_numpy(),
+            'macd': macd.to_numpy(),
+            'macd_signal': macd_signal.to_numpy(),
+            'bb_upper': upper_band.to_numpy(),
+            'bb_lower': lower_band.to_numpy()
+        }
+
+    def analyze_timeframe(self, df, minutes, indicators=None, bars=None):
+        """Signal for a ``minutes`` timeframe spanning the last ``bars`` bars of df.
+
+        ``bars`` defaults to ``minutes`` (one bar per minute). Indicator values
+        come from ``indicators`` (see compute_indicators), computed here when
+        not supplied; df may then be None. Price change and volume are
+        measured over the closes spanning the timeframe (bars + 1 of them),
+        the MACD trend over ``bars`` bars.
+        """
+        bars = minutes if bars is None else bars
+        if indicators is None and (df is None or len(df) < bars):
             return 'NEUTRAL', 0, {'confidence': 50, 'expiration': minutes}, None
 
         try:
-            recent_data = df.tail(minutes)
-            close_prices = recent_data['Close']
-            volume = recent_data['Volume']
+            if indicators is None:
+                indicators = self.compute_indicators(df)
 
-            # Technical Indicators
-            ema_7 = self.calculate_ema(close_prices, 7)
-            ema_21 = self.calculate_ema(close_prices, 21)
-            rsi = self.calculate_rsi(close_prices)
-            macd, macd_signal = self.calculate_macd(close_prices)
-            upper_band, lower_band = self.calculate_bollinger_bands(close_prices)
+            close_prices = indicators['close']
+            if len(close_prices) < bars:
+                return 'NEUTRAL', 0, {'confidence': 50, 'expiration': minutes}, None
+
+            window = min(bars + 1, len(close_prices))
+            volume = indicators['volume'][-window:]
+            ema_7 = indicators['ema_7']
+            ema_21 = indicators['ema_21']
+            rsi = indicators['rsi']
+            macd = indicators['macd']
+            macd_signal = indicators['macd_signal']
+            upper_band = indicators['bb_upper']
+            lower_band = indicators['bb_lower']
 
             # Price Analysis
-            start_price = close_prices.iloc[0]
-            end_price = close_prices.iloc[-1]
+            start_price = close_prices[-window]
+            end_price = close_prices[-1]
             price_change = ((end_price - start_price) / start_price) * 100
 
             # Volume Analysis
             avg_volume = volume.mean()
-            current_volume = volume.iloc[-1]
+            current_volume = volume[-1]
             volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1.0
+            params = self.signal_params
             volume_strength = (
-                3 if volume_ratio > 1.5 else  # Снизили порог с 2.0 до 1.5
-                2 if volume_ratio > 1.2 else  # Снизили порог с 1.5 до 1.2
-                1 if volume_ratio > 1.0 else
+                3 if volume_ratio > params['volume_high'] else  # Снизили порог с 2.0 до 1.5
+                2 if volume_ratio > params['volume_medium'] else  # Снизили порог с 1.5 до 1.2
+                1 if volume_ratio > params['volume_low'] else
                 0
             )
 
@@ -159,17 +749,17 @@ class MarketAnalyzer:
             trend_signals = []
 
             # EMA Signals
-            ema_diff_percent = ((ema_7.iloc[-1] - ema_21.iloc[-1]) / ema_21.iloc[-1]) * 100
-            if ema_diff_percent > 0.05:  # Снизили порог с 0.1% до 0.05%
+            ema_diff_percent = ((ema_7[-1] - ema_21[-1]) / ema_21[-1]) * 100
+            if ema_diff_percent > params['ema_spread']:  # Снизили порог с 0.1% до 0.05%
                 trend_signals.append(1)
-            elif ema_diff_percent < -0.05:
+            elif ema_diff_percent < -params['ema_spread']:
                 trend_signals.append(-1)
 
             logger.info(f"EMA analysis - diff: {ema_diff_percent:.2f}%")
 
             # MACD Signal
-            macd_diff = macd.iloc[-1] - macd_signal.iloc[-1]
-            macd_trend = macd.iloc[-1] - macd.iloc[-2]  # Изменение MACD
+            macd_diff = macd[-1] - macd_signal[-1]
+            macd_trend = macd[-1] - macd[-1 - min(bars, len(macd) - 1)]  # Изменение MACD за период
             if macd_diff > 0:
                 trend_signals.append(1)
                 if macd_trend > 0:  # Тренд MACD растет
@@ -182,25 +772,25 @@ class MarketAnalyzer:
             logger.info(f"MACD analysis - diff: {macd_diff:.4f}, trend: {macd_trend:.4f}")
 
             # RSI Signals - усилили влияние RSI
-            last_rsi = rsi.iloc[-1]
-            if last_rsi < 35:
+            last_rsi = rsi[-1]
+            if last_rsi < params['rsi_oversold']:
                 trend_signals.extend([2, 1])  # Добавили дополнительный сигнал на покупку
-            elif last_rsi > 65:
+            elif last_rsi > params['rsi_overbought']:
                 trend_signals.extend([-2, -1])  # Добавили дополнительный сигнал на продажу
-            elif last_rsi < 45:
+            elif last_rsi < params['rsi_buy']:
                 trend_signals.append(1)
-            elif last_rsi > 55:
+            elif last_rsi > params['rsi_sell']:
                 trend_signals.append(-1)
 
             logger.info(f"RSI analysis - value: {last_rsi:.1f}")
 
             # Bollinger Bands Signal
-            current_price = close_prices.iloc[-1]
+            current_price = close_prices[-1]
             bb_position = 'normal'
-            if current_price < lower_band.iloc[-1]:
+            if current_price < lower_band[-1]:
                 trend_signals.append(2)  # Strong buy signal
                 bb_position = 'oversold'
-            elif current_price > upper_band.iloc[-1]:
+            elif current_price > upper_band[-1]:
                 trend_signals.append(-2)  # Strong sell signal
                 bb_position = 'overbought'
 
@@ -208,15 +798,15 @@ class MarketAnalyzer:
 
             # Calculate signal strength
             trend_strength = sum(trend_signals)
-            trend_strength *= (1 + (volume_strength * 0.2))  # Volume impact
+            trend_strength *= (1 + (volume_strength * params['volume_weight']))  # Volume impact
 
             logger.info(f"Signal analysis - trend signals: {trend_signals}, final strength: {trend_strength:.2f}")
 
             # Signal determination
-            confidence = 50 + (abs(trend_strength) * 5)  # Base confidence on strength
-            confidence = min(95, max(50, confidence))  # Cap between 50-95%
+            confidence = params['confidence_base'] + (abs(trend_strength) * params['confidence_step'])  # Base confidence on strength
+            confidence = min(params['confidence_max'], max(params['confidence_base'], confidence))  # Cap between 50-95%
 
-            if abs(trend_strength) >= 1.2:  # Снизили порог с 1.5 до 1.2
+            if abs(trend_strength) >= params['signal_threshold']:  # Снизили порог с 1.5 до 1.2
                 signal = 'BUY' if trend_strength > 0 else 'SELL'
             else:
                 signal = 'NEUTRAL'
@@ -227,7 +817,7 @@ class MarketAnalyzer:
                 'confidence': round(confidence, 1),
                 'expiration': minutes,
                 'rsi': round(last_rsi, 2),
-                'macd': round(macd.iloc[-1], 4),
+                'macd': round(macd[-1], 4),
                 'bb_position': bb_position
             }
 
@@ -237,42 +827,292 @@ class MarketAnalyzer:
             logger.error(f"Analysis error: {str(e)}")
             return 'NEUTRAL', 0, {'confidence': 50, 'expiration': minutes}, str(e)
 
-    def analyze_market(self):
+    def _timeframe_resolution(self, pyramid, minutes):
+        """(interval, bars) a timeframe is analysed on.
+
+        Uses the coarsest pyramid level that fits into the timeframe and steps
+        down to finer levels while a level has not collected enough bars yet.
+        """
+        levels = [interval for interval in pyramid.intervals
+                  if interval_seconds(interval) <= interval_seconds(resolution_for(minutes, pyramid.intervals))]
+        for interval in reversed(levels):
+            bars = max(1, minutes * 60 // interval_seconds(interval))
+            if len(pyramid.levels[interval]) >= bars + INDICATOR_WARMUP or interval == pyramid.base_interval:
+                return interval, bars
+        return pyramid.base_interval, max(1, minutes * 60 // interval_seconds(pyramid.base_interval))
+
+    def _analyze_data(self, pyramid, timeframes=None):
+        """Analyse the symbol's bar pyramid for every timeframe.
+
+        Each timeframe reads the resolution it needs directly (see
+        _timeframe_resolution); indicators are computed once per resolution.
+        Besides the signals the result carries the latest native bars
+        ('market_data') and their indicator arrays ('series'), so the chart
+        can be drawn without fetching again.
+        """
+        timeframes = timeframes or TIMEFRAMES
+        series = {}
+        timeframe_analysis = {}
+
+        for minutes in timeframes:
+            interval, bars = self._timeframe_resolution(pyramid, minutes)
+            if interval not in series:
+                series[interval] = self.compute_bar_indicators(pyramid.levels[interval].window())
+
+            logger.debug(f"Analyzing {minutes}min timeframe for {self.symbol} on {interval} bars")
+            signal, change, tf_indicators, error = self.analyze_timeframe(
+                None, minutes, series[interval], bars=bars
+            )
+
+            if error:
+                logger.error(f"Error analyzing {minutes}min timeframe: {error}")
+
+            timeframe_analysis[minutes] = {
+                'signal': signal,
+                'change': change,
+                'indicators': tf_indicators,
+                'resolution': interval
+            }
+            logger.debug(f"{minutes}min analysis complete - Signal: {signal}, Change: {change:.2f}%")
+
+        # Chart bars and their series come from one snapshot of the native level
+        base_bars = pyramid.base.window()
+        base_series = self.compute_bar_indicators(base_bars)
+        market_data = bars_to_frame({name: values[-CHART_BARS:] for name, values in base_bars.items()})
+
+        return {
+            'symbol': self.symbol,
+            'current_price': market_data['Close'].iloc[-1],
+            'timeframes': timeframe_analysis,
+            'bar_time': int(base_bars['timestamp'][-1]),
+            'timestamp': datetime.now(),
+            'market_data': market_data,
+            'series': base_series
+        }
+
+    def _cached_analysis(self, timeframes):
+        """Cached result for the newest held bar, None when it has to be computed.
+
+        Only the default timeframes are cached, and only while the native
+        bars are fresh, so a hit never serves a bar older than the bar cache would.
+        """
+        if list(timeframes) != TIMEFRAMES or not bar_cache.is_fresh(self.symbol, DEFAULT_INTERVAL):
+            return None
+        bar_time = bar_buffers.pyramid(self.symbol).base.last_timestamp
+        if bar_time is None:
+            return None
+        return signal_cache.get(self.symbol, bar_time)
+
+    def _analyze_cached(self, timeframes):
+        """_analyze_data once per (symbol, bar); concurrent misses share one run"""
+        pyramid = bar_buffers.pyramid(self.symbol)
+        if list(timeframes) != TIMEFRAMES:
+            return self._analyze_data(pyramid, timeframes)
+        bar_time = pyramid.base.last_timestamp
+        result = signal_cache.get(self.symbol, bar_time)
+        if result is None:
+            result = analysis_flight.do((self.symbol, bar_time), self._analyze_and_cache, pyramid, timeframes)
+        return result
+
+    def _analyze_and_cache(self, pyramid, timeframes):
+        result = self._analyze_data(pyramid, timeframes)
+        signal_cache.put(self.symbol, result['bar_time'], result)
+        return result
+
+    def _stale_analysis(self):
+        """Last good analysis of the symbol marked with its age, None when there is none.
+
+        Served instead of an error while the market data source is failing.
+        """
+        result = signal_cache.latest(self.symbol)
+        if result is None:
+            return None
+        age = (datetime.now() - result['timestamp']).total_seconds()
+        circuit_breakers.get(get_provider().name, self.symbol).record_stale(age)
+        logger.warning(f"Serving a {age:.0f}s old analysis for {self.symbol}")
+        return {**result, 'stale': True, 'age': age}
+
+    def _required_minutes(self, timeframes):
+        # Native history for the longest timeframe plus the indicator warm-up
+        return max(timeframes) + INDICATOR_WARMUP * interval_seconds(DEFAULT_INTERVAL) // 60
+
+    def analyze_market(self, timeframes=None):
+        timeframes = timeframes or TIMEFRAMES
         try:
+            cached = self._cached_analysis(timeframes)
+            if cached is not None:
+                logger.debug(f"Signal cache hit for {self.symbol}")
+                return cached
+
             logger.info(f"Starting market analysis for {self.symbol}")
-            df, error_message = self.get_market_data(minutes=max(TIMEFRAMES) + 5)
+            df, error_message = self.get_market_data(minutes=self._required_minutes(timeframes))
 
             if error_message:
                 logger.error(f"Market data error for {self.symbol}: {error_message}")
-                return {'error': error_message}
+                return self._stale_analysis() or {'error': error_message}
 
             if df is None or df.empty:
                 logger.error(f"No market data available for {self.symbol}")
                 return {'error': self.error_messages['NO_DATA']}
 
-            current_price = df['Close'].iloc[-1]
-            timeframe_analysis = {}
+            return self._analyze_cached(timeframes)
+
+        except Exception as e:
+            logger.error(f"Market analysis error for {self.symbol}: {str(e)}")
+            return {'error': self.error_messages['GENERAL_ERROR']}
 
-            for minutes in TIMEFRAMES:
-                logger.debug(f"Analyzing {minutes}min timeframe for {self.symbol}")
-                signal, change, indicators, error = self.analyze_timeframe(df, minutes)
+    async def analyze_market_async(self, timeframes=None, timeout=ANALYSIS_TIMEOUT):
+        """Async analyze_market: never blocks the event loop on market data.
 
-                if error:
-                    logger.error(f"Error analyzing {minutes}min timeframe: {error}")
+        The whole analysis (fetch retries included) is capped at ``timeout``
+        seconds and reports TIMEOUT_ERROR when it runs out. During a bar that
+        was already analysed the cached result is returned without leaving
+        the event loop.
+        """
+        timeframes = timeframes or TIMEFRAMES
+        try:
+            cached = self._cached_analysis(timeframes)
+            if cached is not None:
+                logger.debug(f"Signal cache hit for {self.symbol}")
+                return cached
 
-                timeframe_analysis[minutes] = {
-                    'signal': signal,
-                    'change': change,
-                    'indicators': indicators
-                }
-                logger.debug(f"{minutes}min analysis complete - Signal: {signal}, Change: {change:.2f}%")
+            logger.info(f"Starting async market analysis for {self.symbol}")
+            df, error_message = await asyncio.wait_for(
+                self.get_market_data_async(minutes=self._required_minutes(timeframes)),
+                timeout
+            )
 
-            return {
-                'current_price': current_price,
-                'timeframes': timeframe_analysis,
-                'timestamp': datetime.now()
-            }
+            if error_message:
+                logger.error(f"Market data error for {self.symbol}: {error_message}")
+                return self._stale_analysis() or {'error': error_message}
+
+            if df is None or df.empty:
+                logger.error(f"No market data available for {self.symbol}")
+                return {'error': self.error_messages['NO_DATA']}
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, self._analyze_cached, timeframes)
 
+        except asyncio.TimeoutError:
+            logger.error(f"Market analysis for {self.symbol} timed out after {timeout}s")
+            return self._stale_analysis() or {'error': self.error_messages['TIMEOUT_ERROR']}
+        except asyncio.CancelledError:
+            logger.info(f"Market analysis for {self.symbol} was cancelled")
+            raise
         except Exception as e:
             logger.error(f"Market analysis error for {self.symbol}: {str(e)}")
-            return {'error': self.error_messages['GENERAL_ERROR']}
\ No newline at end of file
+            return {'error': self.error_messages['GENERAL_ERROR']}
+
+SIGNAL_NAMES = {1: 'BUY', -1: 'SELL', 0: 'NEUTRAL'}
+
+def get_active_symbols():
+    """Symbols of active pairs from the currency_pairs table.
+
+    Falls back to CURRENCY_PAIRS when the table is empty or unavailable.
+    """
+    try:
+        # Imported here: models connects to the database on import
+        from models import get_all_currency_pairs
+        pairs = get_all_currency_pairs()
+    except Exception as e:
+        logger.warning(f"Currency pairs table unavailable, using all pairs: {str(e)}")
+        pairs = None
+    if not pairs:
+        return list(CURRENCY_PAIRS.values())
+    return list(dict.fromkeys(pair['symbol'] for pair in pairs if pair.get('is_active')))
+
+def get_active_pairs():
+    """CURRENCY_PAIRS entries whose symbol is active"""
+    active = set(get_active_symbols())
+    return {pair: symbol for pair, symbol in CURRENCY_PAIRS.items() if symbol in active}
+
+scan_flight = SingleFlight('market-scan')
+_scan_cache = {}
+_scan_cache_lock = threading.Lock()
+
+def scan_market(pairs=None, minutes=SCAN_TIMEFRAME, params=None, fetch=True):
+    """Rank every pair by the strength of its signal on the latest bar.
+
+    All pairs with SCAN_BARS bars at the timeframe's resolution are stacked
+    into one (pair x bar) array, so indicators and scoring run once for the
+    whole market. Defaults to the active pairs; stale pairs are
+    batch-fetched first unless fetch is False. Returns a dict with the ranked 'entries', strongest BUY/SELL first.
+    """
+    pairs = pairs or get_active_pairs()
+    params = params or SIGNAL_PARAMS
+    if fetch:
+        fetch_batch(list(pairs.values()))
+
+    interval = resolution_for(minutes)
+    bars = max(1, minutes * 60 // interval_seconds(interval))
+    names, windows, skipped = [], [], []
+    for pair, symbol in pairs.items():
+        window = bar_buffers.get(symbol, interval).window(SCAN_BARS)
+        if len(window['close']) < SCAN_BARS or not np.isfinite(window['close']).all():
+            skipped.append(pair)
+            continue
+        names.append((pair, symbol))
+        windows.append(window)
+
+    entries = []
+    bar_time = None
+    if windows:
+        close = np.vstack([window['close'] for window in windows])
+        volume = np.vstack([window['volume'] for window in windows])
+        indicators = indicator_kernel.compute_all(close)
+        scores = signal_arrays(close, volume, bars, params, indicators)
+        strength = scores['strength'][:, -1]
+        change = (close[:, -1] - close[:, -1 - bars]) / close[:, -1 - bars] * 100
+        for i in np.lexsort((-np.abs(strength), scores['signal'][:, -1] == 0)):
+            pair, symbol = names[i]
+            entries.append({
+                'pair': pair,
+                'symbol': symbol,
+                'signal': SIGNAL_NAMES[int(scores['signal'][i, -1])],
+                'strength': round(float(strength[i]), 2),
+                'confidence': round(float(scores['confidence'][i, -1]), 1),
+                'rsi': round(float(indicators['rsi'][i, -1]), 2),
+                'change': float(change[i]),
+                'price': float(close[i, -1])
+            })
+        bar_time = pd.to_datetime(max(int(window['timestamp'][-1]) for window in windows), utc=True)
+
+    logger.info(f"Market scan ranked {len(entries)} pairs on {interval} bars, skipped {len(skipped)}")
+    return {
+        'minutes': minutes,
+        'resolution': interval,
+        'bar_time': bar_time,
+        'timestamp': datetime.now(),
+        'entries': entries,
+        'skipped': skipped
+    }
+
+def get_market_scan(minutes=SCAN_TIMEFRAME):
+    """Scanner result for the current bar.
+
+    Computed once per bar by the first caller (concurrent callers share
+    that run) or ahead of time by refresh_market_scan; everyone else gets
+    the cached result.
+    """
+    bar_close = next_bar_close(DEFAULT_INTERVAL)
+    with _scan_cache_lock:
+        cached = _scan_cache.get(minutes)
+    if cached is not None and cached[0] == bar_close:
+        return cached[1]
+    return scan_flight.do((minutes, bar_close), _scan_and_cache, minutes, bar_close, True)
+
+def refresh_market_scan(minutes=SCAN_TIMEFRAME):
+    """Rebuild the cached scan from the bars already held (called after a market data refresh)"""
+    bar_close = next_bar_close(DEFAULT_INTERVAL)
+    return scan_flight.do((minutes, bar_close, 'refresh'), _scan_and_cache, minutes, bar_close, False)
+
+def _scan_and_cache(minutes, bar_close, fetch):
+    scan = scan_market(minutes=minutes, fetch=fetch)
+    with _scan_cache_lock:
+        _scan_cache[minutes] = (bar_close, scan)
+    return scan
+
+async def get_market_scan_async(minutes=SCAN_TIMEFRAME):
+    """get_market_scan on the shared market data executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, get_market_scan, minutes)
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bar_buffer import INTERVAL_NS, bar_buffers
+from config import CURRENCY_PAIRS
+from market_analyzer import _executor, fetch_batch
+from market_data import DEFAULT_INTERVAL, SingleFlight, next_bar_close
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_WINDOW = 288  # 5m log returns in the rolling window (one day)
+STRENGTH_BARS = 48  # latest 5m returns summed into currency strength (four hours)
+RESYNC_EVERY = 288  # incremental updates before the co-moments are recomputed from the window
+
+def pair_currencies(symbol):
+    """(base, quote) for provider symbols like EURUSD=X or BTC-USD, None otherwise"""
+    if symbol.endswith('=X') and len(symbol) == 8:
+        return symbol[:3], symbol[3:6]
+    if '-' in symbol:
+        base, quote = symbol.split('-', 1)
+        return base, quote
+    return None
+
+def _ffill(values):
+    """Forward-fill NaNs down the rows of a 2-D array"""
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(index, axis=0, out=index)
+    return values[index, np.arange(values.shape[1])]
+
+class CorrelationEngine:
+    """Rolling pair correlations and per-currency strength over all pairs.
+
+    Keeps the last ``window`` closed-bar log returns of every pair in a
+    (window x pair) ring plus running sums of returns and of their cross
+    products. A new bar adds one return row and drops the oldest, so each
+    update costs O(pairs^2) however long the window is; the sums are
+    recomputed from the ring every RESYNC_EVERY rows to stop float drift.
+    Pairs are aligned on the 5m grid with the last known close carried
+    forward, so a closed market contributes zero returns.
+    """
+
+    def __init__(self, pairs=None, window=CORRELATION_WINDOW, interval=DEFAULT_INTERVAL):
+        self.pairs = dict(pairs or CURRENCY_PAIRS)
+        self.names = list(self.pairs)
+        self.symbols = [self.pairs[name] for name in self.names]
+        self.window = window
+        self.interval = interval
+        self._length = INTERVAL_NS[interval]
+
+        count = len(self.names)
+        self._returns = np.zeros((window, count))
+        self._pos = 0
+        self._count = 0
+        self._sum = np.zeros(count)
+        self._cross = np.zeros((count, count))
+        self._last_close = np.full(count, np.nan)
+        self._since_resync = 0
+        self.last_time = None  # grid timestamp (ns) of the newest return
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+        # Incidence of pairs on currencies: +1 for the base, -1 for the quote
+        self.currencies = sorted({c for s in self.symbols if pair_currencies(s) for c in pair_currencies(s)})
+        self._incidence = np.zeros((len(self.currencies), count))
+        for j, symbol in enumerate(self.symbols):
+            parsed = pair_currencies(symbol)
+            if parsed:
+                self._incidence[self.currencies.index(parsed[0]), j] = 1
+                self._incidence[self.currencies.index(parsed[1]), j] = -1
+
+    def _closes_at(self, grid):
+        """(len(grid), pairs) closes at or before every grid timestamp, NaN when unknown"""
+        closes = np.full((grid.size, len(self.symbols)), np.nan)
+        for j, symbol in enumerate(self.symbols):
+            buffer = bar_buffers.get(symbol, self.interval, create=False)
+            if buffer is None or not len(buffer):
+                continue
+            bars = buffer.window()
+            index = np.searchsorted(bars['timestamp'], grid, side='right') - 1
+            known = index >= 0
+            closes[known, j] = bars['close'][index[known]]
+        return closes
+
+    def _resync(self):
+        rows = self._returns[:self._count]
+        self._sum = rows.sum(axis=0)
+        self._cross = rows.T @ rows
+        self._since_resync = 0
+
+    def _rebuild(self, end):
+        grid = end - np.arange(self.window, -1, -1, dtype=np.int64) * self._length
+        closes = _ffill(self._closes_at(grid))
+        returns = np.nan_to_num(np.diff(np.log(closes), axis=0))
+        self._returns[:] = returns
+        self._pos = 0
+        self._count = self.window
+        self._last_close = closes[-1]
+        self._resync()
+        logger.info(f"Correlation window rebuilt from {self.window} bars of {len(self.symbols)} pairs")
+
+    def _append(self, grid):
+        closes = self._closes_at(grid)
+        closes = _ffill(np.vstack([self._last_close, closes]))
+        returns = np.nan_to_num(np.diff(np.log(closes), axis=0))
+        for row in returns:
+            if self._count == self.window:
+                old = self._returns[self._pos]
+                self._sum -= old
+                self._cross -= np.outer(old, old)
+            else:
+                self._count += 1
+            self._returns[self._pos] = row
+            self._sum += row
+            self._cross += np.outer(row, row)
+            self._pos = (self._pos + 1) % self.window
+        self._last_close = closes[-1]
+        self._since_resync += len(returns)
+        if self._since_resync >= RESYNC_EVERY:
+            self._resync()
+
+    def _closed_bar_start(self, now=None):
+        """Start (ns) of the newest closed bar"""
+        now = time.time() if now is None else now
+        return int(now * 10**9) // self._length * self._length - self._length
+
+    def is_current(self, now=None):
+        """True when the snapshot already covers the newest closed bar"""
+        with self._lock:
+            return self._snapshot is not None and self.last_time == self._closed_bar_start(now)
+
+    def update(self, now=None):
+        """Roll forward to the last closed bar; returns the current snapshot"""
+        end = self._closed_bar_start(now)
+        with self._lock:
+            if self.last_time is None or end - self.last_time > self.window * self._length:
+                self._rebuild(end)
+            elif end > self.last_time:
+                self._append(np.arange(self.last_time + self._length, end + 1, self._length, dtype=np.int64))
+            elif self._snapshot is not None:
+                return self._snapshot
+            self.last_time = end
+            self._snapshot = self._build_snapshot()
+            return self._snapshot
+
+    def _build_snapshot(self):
+        count = max(self._count, 1)
+        mean = self._sum / count
+        covariance = self._cross / count - np.outer(mean, mean)
+        spread = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = covariance / np.outer(spread, spread)
+        correlation = np.clip(np.nan_to_num(correlation), -1.0, 1.0)
+        np.fill_diagonal(correlation, np.where(spread > 0, 1.0, 0.0))
+
+        # Log-return sum of the latest STRENGTH_BARS rows of the ring
+        recent = min(STRENGTH_BARS, self._count)
+        rows = (self._pos - 1 - np.arange(recent)) % self.window
+        moves = self._returns[rows].sum(axis=0)
+        pairs_per_currency = np.abs(self._incidence).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strength = self._incidence @ moves / pairs_per_currency * 100
+        ranked = sorted(
+            (
+                {'currency': currency, 'strength': float(value), 'pairs': int(pairs)}
+                for currency, value, pairs in zip(self.currencies, strength, pairs_per_currency)
+                if pairs
+            ),
+            key=lambda item: item['strength'],
+            reverse=True
+        )
+
+        return {
+            'pairs': self.names,
+            'correlation': correlation,
+            'strength': ranked,
+            'bar_time': pd.to_datetime(self.last_time, utc=True),
+            'returns': self._count,
+            'timestamp': datetime.now()
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot
+
+def top_correlations(snapshot, count=5):
+    """Most strongly (positively or negatively) correlated distinct pairs"""
+    correlation = snapshot['correlation']
+    upper = np.triu_indices_from(correlation, k=1)
+    order = np.argsort(-np.abs(correlation[upper]))[:count]
+    return [
+        (snapshot['pairs'][upper[0][i]], snapshot['pairs'][upper[1][i]], float(correlation[upper][i]))
+        for i in order
+    ]
+
+correlation_engine = CorrelationEngine()
+correlation_flight = SingleFlight('market-correlation')
+
+def get_market_correlation(fetch=True):
+    """Correlation/strength snapshot for the last closed bar.
+
+    Rolled forward once per bar by the first caller (concurrent callers
+    share its fetch and update) or ahead of time by the market data
+    refresher; everyone else gets the cached snapshot.
+    """
+    if correlation_engine.is_current():
+        return correlation_engine.snapshot()
+    return correlation_flight.do(next_bar_close(DEFAULT_INTERVAL), _fetch_and_update, fetch)
+
+def _fetch_and_update(fetch):
+    if fetch:
+        fetch_batch(correlation_engine.symbols)
+    return correlation_engine.update()
+
+async def get_market_correlation_async():
+    """get_market_correlation on the shared market data executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, get_market_correlation)
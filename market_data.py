@@ -0,0 +1,378 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = '5m'  # Native bar interval requested from the provider
+
+# Bar interval lengths in seconds
+INTERVAL_SECONDS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600,
+    '4h': 14400,
+}
+
+BAR_CACHE_SIZE = 128  # (symbol, interval) entries kept in memory
+SIGNAL_CACHE_SIZE = 256  # (symbol, bar) analysis results kept in memory
+BREAKER_FAILURES = 3  # consecutive failed requests that open a circuit breaker
+BREAKER_COOLDOWN = 30  # seconds an open breaker waits before its first probe
+BREAKER_MAX_COOLDOWN = 600  # cap for the cooldown, doubled after every failed probe
+
+def interval_seconds(interval):
+    return INTERVAL_SECONDS[interval]
+
+def next_bar_close(interval, now=None):
+    """Unix time at which the bar currently being formed closes"""
+    now = time.time() if now is None else now
+    length = interval_seconds(interval)
+    return (int(now // length) + 1) * length
+
+class BarCache:
+    """Process-wide LRU record of fresh bars keyed by (symbol, interval).
+
+    An entry holds only the timestamp of the newest bar held in bar_buffers
+    and lives until the close of the bar during which it was stored, so
+    every request inside the same bar window shares one download. The bars
+    themselves are read from the ring buffers, never copied in here.
+    """
+
+    def __init__(self, maxsize=BAR_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, symbol, interval=DEFAULT_INTERVAL, now=None):
+        now = time.time() if now is None else now
+        key = (symbol, interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def is_fresh(self, symbol, interval=DEFAULT_INTERVAL, now=None):
+        """Check for a live entry without touching LRU order or counters"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get((symbol, interval))
+            return entry is not None and entry[1] > now
+
+    def put(self, symbol, interval, bar_time, now=None):
+        expires_at = next_bar_close(interval, now)
+        key = (symbol, interval)
+        with self._lock:
+            self._entries[key] = (bar_time, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.debug(f"Evicted {evicted} from bar cache")
+
+    def invalidate(self, symbol=None, interval=None):
+        with self._lock:
+            for key in list(self._entries):
+                if (symbol is None or key[0] == symbol) and (interval is None or key[1] == interval):
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0,
+            }
+
+bar_cache = BarCache()
+
+class SignalCache:
+    """LRU cache of analysis results keyed by (symbol, last bar timestamp).
+
+    Every request made while the same bar is the newest one gets the same
+    result. Beside each result the cache keeps its formatted messages per
+    variant (pair, language), built by the first caller that needs one.
+    Results and messages are shared and must not be modified.
+    """
+
+    def __init__(self, maxsize=SIGNAL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.messages_built = 0
+
+    def get(self, symbol, bar_time):
+        key = (symbol, bar_time)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['result']
+
+    def put(self, symbol, bar_time, result):
+        key = (symbol, bar_time)
+        with self._lock:
+            self._entries[key] = {'result': result, 'messages': {}}
+            self._entries.move_to_end(key)
+            # An older bar of the same symbol can no longer be requested
+            for stale in [k for k in self._entries if k[0] == symbol and k[1] != bar_time]:
+                del self._entries[stale]
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def message(self, symbol, bar_time, variant, build):
+        """Formatted message for ``variant``, calling build() only on the first request"""
+        with self._lock:
+            entry = self._entries.get((symbol, bar_time))
+            text = entry['messages'].get(variant) if entry is not None else None
+        if text is not None:
+            return text
+        text = build()
+        with self._lock:
+            self.messages_built += 1
+            if entry is not None:
+                entry['messages'].setdefault(variant, text)
+        return text
+
+    def latest(self, symbol):
+        """Newest cached result for the symbol whatever its bar, None when there is none"""
+        with self._lock:
+            bars = [key[1] for key in self._entries if key[0] == symbol]
+            return self._entries[(symbol, max(bars))]['result'] if bars else None
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            for key in list(self._entries):
+                if symbol is None or key[0] == symbol:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'messages_built': self.messages_built,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0,
+            }
+
+signal_cache = SignalCache()
+
+class CircuitBreaker:
+    """Stops requests to an upstream that keeps failing.
+
+    Closed: requests go through; ``failures`` consecutive failures open it.
+    Open: requests are refused until the cooldown has passed, then a single
+    request is let through as a probe (half-open) while the rest are still
+    refused. A successful probe closes the breaker, a failed one reopens it
+    with the cooldown doubled up to ``max_cooldown``.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN,
+                 max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.name = name
+        self.failure_threshold = failures
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = None
+        self.probe_at = None
+        self.refused = 0
+        self.stale_served = 0
+        self.stale_age = None  # age in seconds of the last stale result served
+
+    def allow(self, now=None):
+        """Whether a request may go out now; in half-open state only the probe may"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # A probe that never reported back does not block the breaker forever
+            if now - (self.probe_at or self.opened_at) >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self.probe_at = now
+                logger.info(f"Circuit breaker {self.name}: probing")
+                return True
+            self.refused += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit breaker {self.name}: closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self.opened_at = self.probe_at = None
+
+    def record_failure(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.failures < self.failure_threshold:
+                return
+            if self.state == self.CLOSED:
+                logger.warning(f"Circuit breaker {self.name}: opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = now
+            self.probe_at = None
+
+    def record_stale(self, age):
+        with self._lock:
+            self.stale_served += 1
+            self.stale_age = age
+
+    @property
+    def is_closed(self):
+        return self.state == self.CLOSED
+
+    def stats(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'failures': self.failures,
+                'open_for': now - self.opened_at if self.opened_at is not None else None,
+                'cooldown': self.cooldown,
+                'refused': self.refused,
+                'stale_served': self.stale_served,
+                'stale_age': self.stale_age,
+            }
+
+class CircuitBreakers:
+    """One CircuitBreaker per (provider, symbol), created on first use"""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider, symbol):
+        key = (provider, symbol)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(f"{provider}:{symbol}")
+            return breaker
+
+    def stats(self):
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [breaker.stats() for breaker in breakers]
+
+circuit_breakers = CircuitBreakers()
+
+class _Flight:
+    def __init__(self, future):
+        self.future = future
+        self.callers = 1
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work; everyone who asks for the
+    same key while it is running gets the same concurrent.futures.Future.
+    Works from plain threads (do) and with thread or process executors
+    (submit); async callers can await the future via asyncio.wrap_future.
+    """
+
+    def __init__(self, name='flight'):
+        self.name = name
+        # Re-entrant: a future that is already done runs its callback inside submit()
+        self._lock = threading.RLock()
+        self._flights = {}
+        self.flights = 0
+        self.coalesced = 0
+        self.max_served = 0
+
+    def _join(self, key):
+        flight = self._flights.get(key)
+        if flight is not None:
+            flight.callers += 1
+            self.coalesced += 1
+        return flight
+
+    def _start(self, key, future):
+        flight = _Flight(future)
+        self._flights[key] = flight
+        self.flights += 1
+        future.add_done_callback(lambda _: self._finish(key, flight))
+        return flight
+
+    def _finish(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            self.max_served = max(self.max_served, flight.callers)
+        if flight.callers > 1:
+            logger.info(f"{self.name}: fetch for {key} served {flight.callers} callers")
+
+    def submit(self, key, executor, fn, *args):
+        """Return (future, leader); only the leader's call schedules fn on executor"""
+        with self._lock:
+            flight = self._join(key)
+            if flight is not None:
+                return flight.future, False
+            flight = self._start(key, executor.submit(fn, *args))
+            return flight.future, True
+
+    def do(self, key, fn, *args):
+        """Run fn in the calling thread unless the same key is already in flight"""
+        with self._lock:
+            flight = self._join(key)
+            leader = flight is None
+            if leader:
+                flight = self._start(key, Future())
+        if leader:
+            try:
+                flight.future.set_result(fn(*args))
+            except BaseException as e:
+                flight.future.set_exception(e)
+        return flight.future.result()
+
+    def in_flight(self):
+        with self._lock:
+            return {key: flight.callers for key, flight in self._flights.items()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'flights': self.flights,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights),
+                'max_served': self.max_served,
+            }
+
+fetch_flight = SingleFlight('market-data')
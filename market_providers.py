@@ -0,0 +1,195 @@
+import glob
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import yfinance as yf
+
+from market_data import DEFAULT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+REPLAY_ALIGNMENT = 4 * 3600  # replayed bars are shifted by whole 4h steps so every pyramid bucket stays aligned
+REPLAY_WARMUP_DAYS = 1  # default replay start, counted from the first recorded bar
+
+def _to_utc(moment):
+    """pd.Timestamp in UTC from an aware datetime (as passed by MarketAnalyzer), a naive local one or any timestamp"""
+    if isinstance(moment, datetime) and moment.tzinfo is None:
+        return pd.Timestamp(moment.timestamp(), unit='s', tz='UTC')
+    moment = pd.Timestamp(moment)
+    return moment.tz_localize('UTC') if moment.tzinfo is None else moment.tz_convert('UTC')
+
+def replay_file_name(symbol):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+
+class MarketDataProvider:
+    """Source of OHLCV bars for MarketAnalyzer and fetch_batch.
+
+    history() returns one symbol's raw frame (possibly empty) indexed by
+    time; download() returns {symbol: frame} for many symbols and defaults
+    to calling history() for each. Frames are normalised by the caller.
+    """
+
+    name = 'provider'
+
+    def history(self, symbol, start, end, interval=DEFAULT_INTERVAL):
+        raise NotImplementedError
+
+    def download(self, symbols, start, end, interval=DEFAULT_INTERVAL):
+        return {symbol: self.history(symbol, start, end, interval) for symbol in symbols}
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance through yfinance; download() is one multi-ticker request"""
+
+    name = 'yfinance'
+
+    def history(self, symbol, start, end, interval=DEFAULT_INTERVAL):
+        return yf.Ticker(symbol).history(start=start, end=end, interval=interval, prepost=True)
+
+    def download(self, symbols, start, end, interval=DEFAULT_INTERVAL):
+        data = yf.download(
+            tickers=symbols,
+            start=start,
+            end=end,
+            interval=interval,
+            prepost=True,
+            group_by='ticker',
+            progress=False
+        )
+        if data is None or data.empty:
+            return {}
+
+        frames = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                df = data[symbol]
+            else:
+                df = data
+            # The combined index is the union of all symbols' sessions
+            frames[symbol] = df.dropna(how='all')
+        return frames
+
+class ReplayProvider(MarketDataProvider):
+    """Serves recorded bars from local CSV or Parquet files as if they were live.
+
+    ``directory`` holds one file per symbol (see replay_file_name) with a
+    time index in the first column and Open/High/Low/Close[/Volume]
+    columns. A replay clock starts at ``start`` (default: one day after the
+    earliest recorded bar) and advances ``speed`` recorded seconds per
+    wall-clock second; speed=0 freezes it for fully repeatable runs.
+    Recorded timestamps are shifted towards the present so the requested
+    time ranges and bar-close logic work unchanged, and every request
+    sleeps ``latency`` seconds to mimic the network.
+
+    Point BAR_STORE_DIR somewhere else (or to '') when replaying, otherwise
+    the replayed bars end up in the live bar store.
+    """
+
+    name = 'replay'
+
+    def __init__(self, directory, speed=1.0, latency=0.0, start=None, interval=DEFAULT_INTERVAL):
+        self.directory = directory
+        self.speed = speed
+        self.latency = latency
+        self.interval = interval
+        self._frames = self._load(directory)
+        if not self._frames:
+            raise ValueError(f"No replay files (.csv, .parquet) found in {directory}")
+
+        first = min(df.index[0] for df in self._frames.values())
+        self.start = _to_utc(start) if start is not None else first + pd.Timedelta(days=REPLAY_WARMUP_DAYS)
+        self._wall_origin = time.time()
+        alignment = pd.Timedelta(seconds=REPLAY_ALIGNMENT)
+        self._offset = (_to_utc(datetime.now()) - self.start) // alignment * alignment
+        logger.info(
+            f"Replaying {len(self._frames)} symbols from {directory} starting at {self.start} "
+            f"(speed {speed}x, latency {latency}s)"
+        )
+
+    @staticmethod
+    def _load(directory):
+        frames = {}
+        for path in sorted(glob.glob(os.path.join(directory, '*'))):
+            name, extension = os.path.splitext(os.path.basename(path))
+            if extension == '.csv':
+                df = pd.read_csv(path, index_col=0)
+            elif extension == '.parquet':
+                df = pd.read_parquet(path)
+            else:
+                continue
+            df.index = pd.to_datetime(df.index, utc=True)
+            df.index.name = 'Datetime'
+            frames[name] = df.sort_index()
+        return frames
+
+    def symbols(self):
+        return list(self._frames)
+
+    def now(self):
+        """Current position of the replay clock in recorded time"""
+        elapsed = (time.time() - self._wall_origin) * self.speed
+        return self.start + pd.Timedelta(seconds=elapsed)
+
+    def history(self, symbol, start, end, interval=DEFAULT_INTERVAL):
+        if interval != self.interval:
+            raise ValueError(f"Replay data is recorded at {self.interval}, {interval} was requested")
+        if self.latency:
+            time.sleep(self.latency)
+
+        df = self._frames.get(replay_file_name(symbol))
+        if df is None:
+            return pd.DataFrame()
+
+        # Only bars that have started on the replay clock, shifted into the requested range
+        cursor = self.now()
+        start = _to_utc(start) - self._offset
+        end = min(_to_utc(end) - self._offset, cursor)
+        window = df[(df.index >= start) & (df.index <= end)].copy()
+        window.index = window.index + self._offset
+        return window
+
+def write_replay_file(directory, symbol, df, fmt='csv'):
+    """Record a bar frame in the layout ReplayProvider reads"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{replay_file_name(symbol)}.{fmt}")
+    if fmt == 'parquet':
+        df.to_parquet(path)
+    else:
+        df.to_csv(path)
+    return path
+
+def provider_from_env():
+    """ReplayProvider when MARKET_DATA_REPLAY_DIR is set, YFinanceProvider otherwise"""
+    directory = os.environ.get('MARKET_DATA_REPLAY_DIR')
+    if not directory:
+        return YFinanceProvider()
+    return ReplayProvider(
+        directory,
+        speed=float(os.environ.get('MARKET_DATA_REPLAY_SPEED', 1.0)),
+        latency=float(os.environ.get('MARKET_DATA_REPLAY_LATENCY', 0.0))
+    )
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = provider_from_env()
+            logger.info(f"Market data provider: {_provider.name}")
+        return _provider
+
+def set_provider(provider):
+    """Switch every MarketAnalyzer to ``provider``; returns the previous one"""
+    global _provider
+    with _provider_lock:
+        previous, _provider = _provider, provider
+    logger.info(f"Market data provider: {provider.name}")
+    return previous
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import random
+import time
+from market_analyzer import fetch_batch_async, get_active_symbols, refresh_market_scan, update_indicator_states
+from market_correlation import get_market_correlation
+from market_data import DEFAULT_INTERVAL, next_bar_close
+
+logger = logging.getLogger(__name__)
+
+REFRESH_JOB_NAME = 'market_data_refresh'
+REFRESH_DELAY = 5  # seconds after the bar close, gives the provider time to publish the bar
+REFRESH_JITTER = 10  # random extra seconds so restarts and replicas don't fetch in lockstep
+REFRESH_CONCURRENCY = 2  # batch downloads running at the same time
+REFRESH_BATCH_SIZE = 10  # symbols per batch download
+
+def seconds_until_refresh(interval=DEFAULT_INTERVAL, now=None):
+    now = time.time() if now is None else now
+    return next_bar_close(interval, now) - now + REFRESH_DELAY + random.uniform(0, REFRESH_JITTER)
+
+async def refresh_market_data(context):
+    """Job queue callback: refetch every active pair right after a bar closes"""
+    started = time.monotonic()
+    try:
+        loop = asyncio.get_running_loop()
+        symbols = await loop.run_in_executor(None, get_active_symbols)
+        semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+        async def refresh_chunk(chunk):
+            async with semaphore:
+                frames = await fetch_batch_async(chunk)
+                # Roll the streaming indicators forward by the newly closed bars
+                await loop.run_in_executor(None, update_indicator_states, frames)
+                return frames
+
+        chunks = [symbols[i:i + REFRESH_BATCH_SIZE] for i in range(0, len(symbols), REFRESH_BATCH_SIZE)]
+        results = await asyncio.gather(*(refresh_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+        refreshed = 0
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Market data refresh chunk failed: {result}")
+            else:
+                refreshed += len(result)
+
+        logger.info(
+            f"Refreshed {refreshed}/{len(symbols)} active pairs in {time.monotonic() - started:.1f}s"
+        )
+
+        # Rank the market once for everyone while the bars are fresh
+        await loop.run_in_executor(None, refresh_market_scan)
+        await loop.run_in_executor(None, get_market_correlation, False)
+    except Exception as e:
+        logger.error(f"Market data refresh error: {str(e)}")
+    finally:
+        schedule_next_refresh(context.job_queue)
+
+def schedule_next_refresh(job_queue):
+    delay = seconds_until_refresh()
+    job_queue.run_once(refresh_market_data, delay, name=REFRESH_JOB_NAME)
+    logger.debug(f"Next market data refresh in {delay:.1f}s")
+
+def start_market_refresher(application):
+    """Schedule the bar-clock refresher on the application's job queue"""
+    if application.job_queue is None:
+        logger.warning("Job queue is not available, market data refresher is disabled. "
+                       "Install python-telegram-bot[job-queue] to enable it.")
+        return False
+
+    for job in application.job_queue.get_jobs_by_name(REFRESH_JOB_NAME):
+        job.schedule_removal()
+
+    schedule_next_refresh(application.job_queue)
+    logger.info("Market data refresher started")
+    return True
@@ -6,7 +6,7 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=[
-        'python-telegram-bot>=20.7',
+        'python-telegram-bot[job-queue]>=20.7',
         'yfinance>=0.2.33',
         'pandas>=2.1.3',
         'numpy>=1.26.2',
@@ -0,0 +1,174 @@
+"""Parallel parameter sweep over the signal thresholds.
+
+Backtests every combination of a threshold grid (see SIGNAL_PARAMS) on a
+process pool and ranks the parameter sets by hit rate. Indicator series
+do not depend on the thresholds, so they are computed once per pair and
+resolution in the parent and handed to the workers through one
+multiprocessing.shared_memory block instead of being pickled per task.
+
+    python sweep.py --grid signal_threshold=1.0,1.2,1.5 rsi_oversold=30,35 [--replay-dir DIR] [--workers 8]
+"""
+import argparse
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import indicator_kernel
+from backtest import load_histories, resample_bars, score_signals, signal_arrays
+from bar_buffer import PRICE_COLUMNS
+from market_analyzer import SIGNAL_PARAMS, TIMEFRAMES, resolution_for
+from market_data import interval_seconds
+
+logger = logging.getLogger(__name__)
+
+SERIES_ROWS = ('close', 'volume') + indicator_kernel.INDICATOR_NAMES
+MIN_SIGNALS = 100  # parameter sets with fewer scored signals are ranked last
+TASK_CHUNKSIZE = 4  # parameter sets per pool task
+
+# Worker state, set by _attach in every pool process
+_shm = None
+_series = None
+_timeframes = None
+
+def parameter_grid(grid):
+    """SIGNAL_PARAMS overrides for every combination of {name: [values]}"""
+    unknown = set(grid) - set(SIGNAL_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown signal parameters: {', '.join(sorted(unknown))}")
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def build_series(histories, timeframes):
+    """{(pair, interval): {row: array}} with the threshold-independent inputs of the backtest"""
+    series = {}
+    for pair, (timestamps, values) in histories.items():
+        for interval in sorted({resolution_for(minutes) for minutes in timeframes}, key=interval_seconds):
+            _, bars_values = resample_bars(timestamps, values, interval)
+            close = bars_values[PRICE_COLUMNS.index('close')]
+            rows = {'close': close, 'volume': bars_values[PRICE_COLUMNS.index('volume')]}
+            rows.update(indicator_kernel.compute_all(close))
+            series[(pair, interval)] = rows
+    return series
+
+def share_series(series):
+    """Copy the series into one shared memory block; returns (shm, layout)"""
+    total = sum(rows['close'].size for rows in series.values())
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(SERIES_ROWS) * total * 8))
+    block = np.ndarray((len(SERIES_ROWS), total), dtype=np.float64, buffer=shm.buf)
+    segments = []
+    start = 0
+    for key, rows in series.items():
+        stop = start + rows['close'].size
+        for i, name in enumerate(SERIES_ROWS):
+            block[i, start:stop] = rows[name]
+        segments.append((key, start, stop))
+        start = stop
+    return shm, {'name': shm.name, 'total': total, 'segments': segments}
+
+def _attach(layout, timeframes):
+    """Pool initializer: map the shared block as read-only views"""
+    global _shm, _series, _timeframes
+    _shm = shared_memory.SharedMemory(name=layout['name'])
+    block = np.ndarray((len(SERIES_ROWS), layout['total']), dtype=np.float64, buffer=_shm.buf)
+    block.flags.writeable = False
+    _series = {
+        key: {name: block[i, start:stop] for i, name in enumerate(SERIES_ROWS)}
+        for key, start, stop in layout['segments']
+    }
+    _timeframes = timeframes
+
+def evaluate(overrides, series=None, timeframes=None):
+    """Backtest one parameter set over every pair and timeframe"""
+    series = _series if series is None else series
+    timeframes = _timeframes if timeframes is None else timeframes
+    params = {**SIGNAL_PARAMS, **overrides}
+
+    signals = hits = 0
+    per_timeframe = {}
+    pairs = {pair for pair, _ in series}
+    for minutes in timeframes:
+        interval = resolution_for(minutes)
+        bars = max(1, minutes * 60 // interval_seconds(interval))
+        tf_signals = tf_hits = 0
+        for pair in pairs:
+            rows = series[(pair, interval)]
+            result = signal_arrays(rows['close'], rows['volume'], bars, params, indicators=rows)
+            mask, hit = score_signals(rows['close'], result['signal'], horizon=bars)
+            tf_signals += int(mask.sum())
+            tf_hits += int(hit.sum())
+        per_timeframe[minutes] = round(tf_hits / tf_signals * 100, 2) if tf_signals else None
+        signals += tf_signals
+        hits += tf_hits
+
+    return {
+        'params': overrides,
+        'signals': signals,
+        'hit_rate': round(hits / signals * 100, 2) if signals else None,
+        'per_timeframe': per_timeframe,
+    }
+
+def rank(results, min_signals=MIN_SIGNALS):
+    """Best hit rate first; sets below min_signals go to the end"""
+    return sorted(
+        results,
+        key=lambda r: (r['signals'] >= min_signals, r['hit_rate'] or 0.0, r['signals']),
+        reverse=True
+    )
+
+def run_sweep(histories, grid, timeframes=None, workers=None, min_signals=MIN_SIGNALS):
+    """Backtest every combination of ``grid`` in parallel and return them ranked"""
+    timeframes = timeframes or TIMEFRAMES
+    combinations = parameter_grid(grid)
+    series = build_series(histories, timeframes)
+    shm, layout = share_series(series)
+    del series
+    started = time.monotonic()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(), initializer=_attach, initargs=(layout, timeframes)
+        ) as pool:
+            results = list(pool.map(evaluate, combinations, chunksize=TASK_CHUNKSIZE))
+    finally:
+        shm.close()
+        shm.unlink()
+    logger.info(
+        f"Swept {len(combinations)} parameter sets over {len(histories)} pairs "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    return rank(results, min_signals)
+
+def parse_grid(items):
+    """['name=v1,v2', ...] -> {name: [float, ...]}"""
+    grid = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        grid[name] = [float(value) for value in values.split(',') if value]
+    return grid
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--grid', nargs='+', required=True, help='name=v1,v2,... per SIGNAL_PARAMS entry')
+    parser.add_argument('--replay-dir', help='CSV/Parquet bar files instead of the bar store')
+    parser.add_argument('--pairs', nargs='+', help='pairs such as EUR/USD or symbols such as EURUSD=X')
+    parser.add_argument('--timeframes', type=int, nargs='+', default=TIMEFRAMES)
+    parser.add_argument('--workers', type=int, help='pool size (default: all cores)')
+    parser.add_argument('--min-signals', type=int, default=MIN_SIGNALS)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    histories = load_histories(args.pairs, args.replay_dir)
+    if not histories:
+        raise SystemExit("No bar history found")
+    ranked = run_sweep(histories, parse_grid(args.grid), args.timeframes, args.workers, args.min_signals)
+    for place, result in enumerate(ranked[:args.top], 1):
+        rates = '  '.join(f"{m}m {'-' if r is None else f'{r:.1f}%'}" for m, r in result['per_timeframe'].items())
+        print(f"{place:3}. hit {result['hit_rate'] or 0:.2f}%  signals {result['signals']:7d}  {result['params']}  [{rates}]")
+
+if __name__ == '__main__':
+    main()
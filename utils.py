@@ -1,6 +1,7 @@
 from datetime import datetime
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from config import CURRENCY_PAIRS, LANGUAGES, MESSAGES, forex_pairs, crypto_pairs
+from market_data import signal_cache
 
 def get_language_keyboard():
     keyboard = []
@@ -34,6 +35,21 @@ def get_currency_keyboard(current_lang='tg', user_data=None):
     # Add regular currency pairs button first
     keyboard.append([InlineKeyboardButton("💱 Все валютные пары", callback_data="regular_pairs")])
 
+    # Market scanner: strongest signals across all pairs
+    market_scan_text = {
+        'tg': '🔍 Сканери бозор',
+        'ru': '🔍 Сканер рынка',
+        'uz': '🔍 Bozor skaneri',
+        'kk': '🔍 Нарық сканері',
+        'en': '🔍 Market Scanner'
+    }
+    keyboard.append([
+        InlineKeyboardButton(
+            market_scan_text.get(current_lang, market_scan_text['tg']),
+            callback_data="market_scan"
+        )
+    ])
+
     # Add language change button
     lang_button_text = {
         'tg': '🔄 Забон / Язык / Language',
@@ -176,10 +192,14 @@ def format_signal_message(pair, analysis_result, lang_code='tg'):
 
     result_parts = [
         f"💎 {messages['PAIR_HEADER'].format(escape_markdown(pair))}",
-        f"⌚ {escape_markdown(datetime.now().strftime('%H:%M:%S'))}",
+        f"⌚ {escape_markdown(analysis_result.get('timestamp', datetime.now()).strftime('%H:%M:%S'))}",
         f"💵 {escape_markdown(messages['CURRENT_PRICE'])}: `{current_price:.4f}`\n"
     ]
 
+    if analysis_result.get('stale'):
+        age_minutes = max(1, round(analysis_result['age'] / 60))
+        result_parts.insert(0, f"⚠️ {escape_markdown(messages['STALE_DATA'].format(age_minutes))}\n")
+
     for minutes, data in sorted(timeframes.items()):
         if not data or not isinstance(data, dict):
             continue
@@ -210,4 +230,14 @@ def format_signal_message(pair, analysis_result, lang_code='tg'):
 """
         result_parts.append(timeframe_text)
 
-    return "\n".join(result_parts)
\ No newline at end of file
+    return "\n".join(result_parts)
+
+def get_signal_message(pair, analysis_result, lang_code='tg'):
+    """format_signal_message built once per analysed bar, pair and language"""
+    # Stale results carry their age, so their text is not shared
+    if 'error' in analysis_result or analysis_result.get('stale') or 'bar_time' not in analysis_result:
+        return format_signal_message(pair, analysis_result, lang_code)
+    return signal_cache.message(
+        analysis_result['symbol'], analysis_result['bar_time'], (pair, lang_code),
+        lambda: format_signal_message(pair, analysis_result, lang_code)
+    )